@@ -1,11 +1,13 @@
+import json
 from functools import wraps
 from django.contrib import messages
-from django.http import HttpResponseForbidden, JsonResponse
+from django.http import HttpResponseForbidden
 from django.shortcuts import render
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 
 from .models import UserServiceAccess, Service
+from .responses import CompactJsonResponse
 
 
 def service_access_required(service_slug):
@@ -68,14 +70,14 @@ def service_access_required_ajax(service_slug):
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
             if not request.user.is_authenticated:
-                return JsonResponse({
+                return CompactJsonResponse({
                     'error': _("You must be logged in to access this service.")
                 }, status=401)
             
             try:
                 service = Service.objects.get(slug=service_slug, is_active=True)
             except Service.DoesNotExist:
-                return JsonResponse({
+                return CompactJsonResponse({
                     'error': _("This service is not available.")
                 }, status=404)
             
@@ -96,7 +98,7 @@ def service_access_required_ajax(service_slug):
                     "Sorry, you don't have access to {service_name}. "
                     "Please upgrade your subscription."
                 ).format(service_name=service.name)
-                return JsonResponse({
+                return CompactJsonResponse({
                     'error': error_msg,
                     'upgrade_url': reverse('subscriptions:subscription')
                 }, status=403)
@@ -104,3 +106,39 @@ def service_access_required_ajax(service_slug):
             return view_func(request, *args, **kwargs)
         return wrapper
     return decorator
+
+
+def json_body(required=None):
+    """
+    Decorator that parses a JSON request body once and passes it to the view as ``payload``.
+    
+    Invalid JSON (or a body that isn't a JSON object) gets a 400 response, as does a missing
+    or empty required key.
+    
+    Usage:
+        @json_body(required={'file_id': 'File ID is required'})
+        def my_ajax_view(request, service_slug, payload):
+            file_id = payload['file_id']
+    
+    Args:
+        required: Mapping of required keys to the error message returned when they are missing
+    """
+    required = required or {}
+    
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            try:
+                payload = json.loads(request.body or b'{}')
+            except json.JSONDecodeError:
+                payload = None
+            if not isinstance(payload, dict):
+                return CompactJsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+            
+            for key, error in required.items():
+                if not payload.get(key):
+                    return CompactJsonResponse({'success': False, 'error': error}, status=400)
+            
+            return view_func(request, *args, payload=payload, **kwargs)
+        return wrapper
+    return decorator
@@ -2,6 +2,10 @@ from django import forms
 from django.utils.translation import gettext_lazy as _
 from .models import UserDataFile
 
+# Upload limits, checked in clean_file and advertised through the widget's accept attribute
+ALLOWED_EXTENSIONS = ('.csv', '.json', '.xlsx', '.xls', '.txt')
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+
 
 class DataFileUploadForm(forms.ModelForm):
     """
@@ -19,7 +23,7 @@ class DataFileUploadForm(forms.ModelForm):
                     'focus:outline-none dark:bg-gray-700 dark:border-gray-600 '
                     'dark:placeholder-gray-400'
                 ),
-                'accept': '.csv,.json,.xlsx,.xls,.txt'
+                'accept': ','.join(ALLOWED_EXTENSIONS)
             })
         }
     
@@ -34,13 +38,12 @@ class DataFileUploadForm(forms.ModelForm):
             raise forms.ValidationError(_("Please select a file to upload."))
         
         # Check file size (10MB limit)
-        if file.size > 10 * 1024 * 1024:
+        if file.size > MAX_UPLOAD_SIZE:
             raise forms.ValidationError(_("File size cannot exceed 10MB."))
         
         # Check file type
-        allowed_extensions = ['.csv', '.json', '.xlsx', '.xls', '.txt']
         file_extension = '.' + file.name.split('.')[-1].lower()
-        if file_extension not in allowed_extensions:
+        if file_extension not in ALLOWED_EXTENSIONS:
             raise forms.ValidationError(
                 _("File type not supported. Allowed types: CSV, JSON, Excel, TXT")
             )
@@ -1,11 +1,17 @@
+from django.core.cache import cache
+from django.core.files.storage import default_storage
 from django.utils import timezone
 from django.utils.text import slugify
 from djstripe.models import Subscription, Product
 from djstripe.enums import SubscriptionStatus
 
-from .models import Service, UserServiceAccess
+from .models import Service, UserDataFile, UserServiceAccess
 from apps.users.models import CustomUser
 
+SERVICE_ACCESS_CACHE_TIMEOUT = 60
+ACTIVE_SERVICE_CACHE_TIMEOUT = 300
+PROCESSING_STATUS_CACHE_TIMEOUT = 60 * 60
+
 
 def grant_service_access(user: CustomUser, service_slug: str, subscription: Subscription = None):
     """
@@ -59,6 +65,8 @@ def revoke_service_access(user: CustomUser, service_slug: str):
         user=user,
         service=service
     ).update(is_active=False)
+    # update() skips post_save, so clear the cached access map explicitly
+    clear_user_service_access_cache(user.id)
     
     return True
 
@@ -124,6 +132,113 @@ def get_user_accessible_services(user: CustomUser):
     ).order_by('order', 'name')
 
 
+def _service_access_cache_key(user_id: int) -> str:
+    return f"svc_access:{user_id}"
+
+
+def get_user_service_access_map(user: CustomUser) -> dict:
+    """
+    Get the user's active service accesses as a mapping of service slug to expiry.
+    
+    The mapping is cached for SERVICE_ACCESS_CACHE_TIMEOUT seconds and cleared whenever
+    one of the user's UserServiceAccess rows changes (see apps.services.signals).
+    
+    Args:
+        user: The user to look up
+        
+    Returns:
+        Dict of {service_slug: expires_at or None}
+    """
+    cache_key = _service_access_cache_key(user.id)
+    access_map = cache.get(cache_key)
+    if access_map is None:
+        access_map = dict(
+            UserServiceAccess.objects.filter(user=user, is_active=True).values_list('service__slug', 'expires_at')
+        )
+        cache.set(cache_key, access_map, SERVICE_ACCESS_CACHE_TIMEOUT)
+    return access_map
+
+
+def clear_user_service_access_cache(user_id: int):
+    """
+    Drop the cached service access map for a user.
+    """
+    cache.delete(_service_access_cache_key(user_id))
+
+
+def _active_service_cache_key(service_slug: str) -> str:
+    return f"active_service:{service_slug}"
+
+
+def get_active_service(service_slug: str):
+    """
+    Get an active service by slug.
+    
+    Services change rarely, so the lookup (including a miss) is cached for
+    ACTIVE_SERVICE_CACHE_TIMEOUT seconds and cleared when the Service is saved or deleted
+    (see apps.services.signals).
+    
+    Args:
+        service_slug: The slug of the service
+        
+    Returns:
+        Service object, or None if there is no active service with that slug
+    """
+    return cache.get_or_set(
+        _active_service_cache_key(service_slug),
+        lambda: Service.objects.filter(slug=service_slug, is_active=True).first(),
+        ACTIVE_SERVICE_CACHE_TIMEOUT,
+    )
+
+
+def clear_active_service_cache(service_slug: str):
+    """
+    Drop the cached active service lookup for a slug.
+    """
+    cache.delete(_active_service_cache_key(service_slug))
+
+
+def _processing_status_cache_key(file_id: int) -> str:
+    return f"file_status:{file_id}"
+
+
+def cache_processing_status(data_file: UserDataFile) -> dict:
+    """
+    Store a data file's processing status so status polls can skip the database.
+    
+    Called on every UserDataFile save (see apps.services.signals), so the cached entry
+    follows each status transition.
+    
+    Args:
+        data_file: The data file whose status changed
+        
+    Returns:
+        Dict with the owner's user_id and the status, log and processed_at fields
+    """
+    status = {
+        'user_id': data_file.user_id,
+        'status': data_file.processing_status,
+        'log': data_file.processing_log,
+        'processed_at': data_file.processed_at.isoformat() if data_file.processed_at else None,
+    }
+    cache.set(_processing_status_cache_key(data_file.id), status, PROCESSING_STATUS_CACHE_TIMEOUT)
+    return status
+
+
+def get_cached_processing_status(file_id: int):
+    """
+    Get the cached processing status for a data file, or None on a cache miss.
+    """
+    return cache.get(_processing_status_cache_key(file_id))
+
+
+def clear_processing_status_cache(file_ids):
+    """
+    Drop cached processing statuses, e.g. after a queryset update() that skips post_save.
+    """
+    cache.delete_many([_processing_status_cache_key(file_id) for file_id in file_ids])
+
+
 def user_has_service_access(user: CustomUser, service_slug: str) -> bool:
     """
     Check if a user has access to a specific service.
@@ -138,15 +253,12 @@ def user_has_service_access(user: CustomUser, service_slug: str) -> bool:
     if not user.is_authenticated:
         return False
     
-    try:
-        access = UserServiceAccess.objects.get(
-            user=user,
-            service__slug=service_slug,
-            is_active=True
-        )
-        return access.is_valid
-    except UserServiceAccess.DoesNotExist:
+    access_map = get_user_service_access_map(user)
+    if service_slug not in access_map:
         return False
+    # Expiry is checked against the current time, so a cached map never outlives an expiring access
+    expires_at = access_map[service_slug]
+    return not (expires_at and expires_at < timezone.now())
 
 
 def get_or_create_service_from_product(product: Product) -> Service:
@@ -174,3 +286,21 @@ def get_or_create_service_from_product(product: Product) -> Service:
     )
     
     return service
+
+
+def delete_storage_files(names):
+    """
+    Delete files from the default storage by name.
+    
+    Args:
+        names: Iterable of storage-relative file names; empty names are skipped
+        
+    Returns:
+        Number of files deleted
+    """
+    deleted = 0
+    for name in names:
+        if name:
+            default_storage.delete(name)
+            deleted += 1
+    return deleted
@@ -0,0 +1,11 @@
+from django.http import JsonResponse
+
+
+class CompactJsonResponse(JsonResponse):
+    """
+    JsonResponse serialized without the spaces json.dumps puts after ',' and ':' by default.
+    """
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("json_dumps_params", {"separators": (",", ":")})
+        super().__init__(data, **kwargs)
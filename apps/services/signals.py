@@ -0,0 +1,54 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .helpers import (
+    cache_processing_status,
+    clear_active_service_cache,
+    clear_processing_status_cache,
+    clear_user_service_access_cache,
+)
+from .models import Service, UserDataFile, UserServiceAccess
+
+
+@receiver(post_save, sender=UserServiceAccess)
+@receiver(post_delete, sender=UserServiceAccess)
+def clear_service_access_cache(sender, instance: UserServiceAccess, **kwargs):
+    """
+    Keep the cached per-user access map in sync with UserServiceAccess changes.
+    """
+    clear_user_service_access_cache(instance.user_id)
+
+
+@receiver(pre_save, sender=Service)
+def remember_service_slug(sender, instance: Service, **kwargs):
+    """
+    Record the stored slug before a save, so a renamed service's old cache entry can be cleared too.
+    """
+    instance._previous_slug = None
+    if instance.pk is not None:
+        instance._previous_slug = Service.objects.filter(pk=instance.pk).values_list("slug", flat=True).first()
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def clear_service_cache(sender, instance: Service, **kwargs):
+    """
+    Keep the cached active-service lookup in sync with Service changes, under both the old and new slug.
+    """
+    clear_active_service_cache(instance.slug)
+    previous_slug = getattr(instance, "_previous_slug", None)
+    if previous_slug and previous_slug != instance.slug:
+        clear_active_service_cache(previous_slug)
+
+
+@receiver(post_save, sender=UserDataFile)
+def update_processing_status_cache(sender, instance: UserDataFile, **kwargs):
+    """
+    Refresh the cached processing status on every save, so status polls don't hit the database.
+    """
+    cache_processing_status(instance)
+
+
+@receiver(post_delete, sender=UserDataFile)
+def clear_processing_status(sender, instance: UserDataFile, **kwargs):
+    clear_processing_status_cache([instance.id])
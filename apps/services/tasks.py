@@ -16,8 +16,13 @@ from .models import UserDataFile, UserProcessedData, Service
 
 logger = logging.getLogger(__name__)
 
+STORAGE_DELETE_CHUNK_SIZE = 500
 
-@shared_task
+# Tasks queued from web requests report progress through UserDataFile rows, never through
+# AsyncResult, so they use ignore_result=True to skip the result-backend write.
+
+
+@shared_task(ignore_result=True)
 def process_user_data_file(file_id):
     """
     Process a user's uploaded data file with basic cleansing logic.
@@ -301,13 +306,18 @@ def _call_user_batch_processor(module, data_files_queryset):
     raise RuntimeError("No suitable batch processor found in user module")
 
 
-@shared_task
-def process_all_user_files(user_id: int, service_slug: str):
-    """Process all files for a user+service in a single batch using the user's processed_file.py."""
+@shared_task(ignore_result=True)
+def process_all_user_files(user_id: int, service_slug: str, file_ids: list[int] | None = None):
+    """Process all files for a user+service in a single batch using the user's processed_file.py.
+
+    When ``file_ids`` is given (the view already looked them up), only those files are included.
+    """
     try:
         service = Service.objects.get(slug=service_slug)
         # Get ALL files for this user+service, regardless of status
         all_files = UserDataFile.objects.filter(user_id=user_id, service=service).order_by('-created_at')
+        if file_ids is not None:
+            all_files = all_files.filter(id__in=file_ids)
 
         if not all_files.exists():
             logger.info(f"No files to process for user={user_id}, service={service_slug}")
@@ -335,8 +345,10 @@ def process_all_user_files(user_id: int, service_slug: str):
         if module is None:
             raise RuntimeError("User processed module not found")
 
-        # Mark files as processing
+        # Mark files as processing; update() skips post_save, so drop their cached statuses
         all_files.update(processing_status='processing')
+        from .helpers import clear_processing_status_cache
+        clear_processing_status_cache(all_files.values_list('id', flat=True))
 
         processed_file_cf, summary = _call_user_batch_processor(module, all_files)
 
@@ -408,6 +420,34 @@ def process_all_user_files(user_id: int, service_slug: str):
         return f"Error: {e}"
 
 
+@shared_task(ignore_result=True)
+def delete_all_user_files(user_id: int, service_id: int, file_ids: list[int] | None = None):
+    """Delete a user's files for one service, removing both uploads and processed reports from storage.
+
+    When ``file_ids`` is given (the view already looked them up), only those files are deleted.
+    """
+    from .helpers import delete_storage_files
+
+    user_files = UserDataFile.objects.filter(user_id=user_id, service_id=service_id)
+    if file_ids is not None:
+        user_files = user_files.filter(id__in=file_ids)
+
+    # Remove uploads and their processed reports from storage before the rows go away,
+    # streaming the names so memory stays flat however many files the user has
+    processed_qs = UserProcessedData.objects.filter(data_file__in=user_files)
+    delete_storage_files(
+        processed_qs.values_list('processed_file', flat=True).iterator(chunk_size=STORAGE_DELETE_CHUNK_SIZE)
+    )
+    delete_storage_files(user_files.values_list('file', flat=True).iterator(chunk_size=STORAGE_DELETE_CHUNK_SIZE))
+
+    # One queryset delete; processed data rows cascade from their data files
+    _, per_model = user_files.delete()
+    deleted_count = per_model.get(UserDataFile._meta.label, 0)
+
+    logger.info(f"Deleted {deleted_count} file(s) for user={user_id}, service={service_id}")
+    return f"Deleted {deleted_count} file(s)"
+
+
 @shared_task
 def cleanup_old_files():
     """
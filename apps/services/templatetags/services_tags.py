@@ -5,6 +5,8 @@ from ..helpers import get_user_accessible_services
 
 register = template.Library()
 
+NAVIGATION_ITEMS_CACHE_ATTR = '_navigation_items_cache'
+
 
 @register.inclusion_tag('services/nav_services.html', takes_context=True)
 def nav_services(context):
@@ -38,10 +40,17 @@ def user_navigation_items(user):
     """
     Template tag to get user's navigation items, avoiding duplicates between services and subscriptions.
     Prioritizes subscriptions over services when both exist for the same product.
+
+    The result is memoized on the user instance. ``request.user`` lives for a single request,
+    so the desktop and mobile navs share one lookup without risking stale data across requests.
     """
     if not user.is_authenticated:
         return []
     
+    cached_items = getattr(user, NAVIGATION_ITEMS_CACHE_ATTR, None)
+    if cached_items is not None:
+        return cached_items
+    
     navigation_items = []
     subscription_slugs = set()
     
@@ -65,8 +74,9 @@ def user_navigation_items(user):
         # Fallback if subscription tags are not available
         pass
     
-    # Then, add services that don't have corresponding subscriptions
-    accessible_services = get_user_accessible_services(user)
+    # Then, add services that don't have corresponding subscriptions.
+    # Only the columns rendered in the nav are loaded.
+    accessible_services = get_user_accessible_services(user).only('id', 'name', 'slug', 'icon')
     
     for service in accessible_services:
         # Only add if there's no corresponding subscription
@@ -80,4 +90,5 @@ def user_navigation_items(user):
                 'type': 'service'
             })
     
+    setattr(user, NAVIGATION_ITEMS_CACHE_ATTR, navigation_items)
     return navigation_items
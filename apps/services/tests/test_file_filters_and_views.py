@@ -2,12 +2,20 @@
 Tests for file_filters template tags and new service views.
 """
 
-from django.test import TestCase, Client
+# Keep these classes on django.test.TestCase: each test rolls back to a savepoint, whereas
+# TransactionTestCase/LiveServerTestCase truncate every table (including dj-stripe's) per test.
+# Enforced by the services-tests-use-testcase pre-commit hook.
+
+from unittest import mock
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.template import Template, Context
-from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 import json
+from uuid import uuid4
 
 from apps.services.models import Service, UserDataFile
 from apps.subscriptions.models import SubscriptionAvailability
@@ -16,75 +24,78 @@ from djstripe import enums
 
 User = get_user_model()
 
+# Constant request bodies, encoded once
+EMPTY_JSON = b'{}'
+INVALID_JSON = b'invalid json'
+MISSING_FILE_JSON = b'{"file_id": 99999}'
+
+# Uploaded fixtures never touch the filesystem; tests only inspect DB rows
+IN_MEMORY_STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.InMemoryStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
 
 class FileFiltersTemplateTagsTests(TestCase):
     """Test the file_filters template tag library."""
 
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Compile each template once; tests only render against a fresh Context.
+        cls.filename_tpl = Template("{% load file_filters %}{{ path|filename }}")
+        cls.file_extension_tpl = Template("{% load file_filters %}{{ path|file_extension }}")
+        cls.file_size_human_tpl = Template("{% load file_filters %}{{ size|file_size_human }}")
+
     def test_filename_filter(self):
         """Test the filename filter extracts filename correctly."""
-        template_code = "{% load file_filters %}{{ 'path/to/file.txt'|filename }}"
-        
-        template = Template(template_code)
-        context = Context({})
-        result = template.render(context)
-        
+        result = self.filename_tpl.render(Context({"path": "path/to/file.txt"}))
         self.assertEqual(result, "file.txt")
 
     def test_file_extension_filter(self):
         """Test the file_extension filter extracts extension correctly."""
-        template_code = "{% load file_filters %}{{ 'file.txt'|file_extension }}"
-        
-        template = Template(template_code)
-        context = Context({})
-        result = template.render(context)
-        
+        result = self.file_extension_tpl.render(Context({"path": "file.txt"}))
         self.assertEqual(result, ".txt")
 
     def test_file_size_human_filter(self):
         """Test the file_size_human filter formats sizes correctly."""
-        template_code = "{% load file_filters %}{{ 1024|file_size_human }}"
-        
-        template = Template(template_code)
-        context = Context({})
-        result = template.render(context)
-        
+        result = self.file_size_human_tpl.render(Context({"size": 1024}))
         self.assertEqual(result, "1.0 KB")
 
     def test_file_size_human_with_invalid_input(self):
         """Test file_size_human filter handles invalid input gracefully."""
-        template_code = "{% load file_filters %}{{ 'invalid'|file_size_human }}"
-        
-        template = Template(template_code)
-        context = Context({})
-        result = template.render(context)
-        
+        result = self.file_size_human_tpl.render(Context({"size": "invalid"}))
         self.assertEqual(result, "0 B")
 
 
+@override_settings(STORAGES=IN_MEMORY_STORAGES)
 class ServiceViewsTests(TestCase):
     """Test the new service views for file processing."""
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """Set up test data."""
-        self.user = User.objects.create_user(
+        cls.user = User.objects.create_user(
             username="testuser@example.com",
             email="testuser@example.com",
             password="testpass123"
         )
-        self.client = Client()
-        self.client.login(username="testuser@example.com", password="testpass123")
 
-        # Create a test Stripe product for subscription
-        self.stripe_product = Product.objects.create(
-            id="prod_test_service",
+        # Create a test Stripe product for subscription.
+        # IDs are unique per class so parallel workers never collide on primary keys.
+        cls.stripe_product = Product.objects.create(
+            id=f"prod_{uuid4().hex}",
             name="Test Service Product",
-            description="A product for testing service",
             active=True
         )
         
-        self.stripe_price = Price.objects.create(
-            id="price_test_service",
-            product=self.stripe_product,
+        cls.stripe_price = Price.objects.create(
+            id=f"price_{uuid4().hex}",
+            product=cls.stripe_product,
             currency="usd",
             unit_amount=1000,
             active=True,
@@ -92,50 +103,69 @@ class ServiceViewsTests(TestCase):
             recurring={"interval": "month", "interval_count": 1}
         )
         
-        self.stripe_product.default_price = self.stripe_price
-        self.stripe_product.save()
+        cls.stripe_product.default_price = cls.stripe_price
+        cls.stripe_product.save()
 
         # Create a test service
-        self.service = Service.objects.create(
+        cls.service = Service.objects.create(
             name="Test Service",
             slug="test-service",
             description="A test service",
-            stripe_product=self.stripe_product,
+            stripe_product=cls.stripe_product,
             is_active=True
         )
 
         # Create subscription availability
         SubscriptionAvailability.objects.create(
-            stripe_product=self.stripe_product,
-            user=self.user,
+            stripe_product=cls.stripe_product,
+            user=cls.user,
             make_subscription_available=True
         )
 
-        # Create a test file
-        self.test_file = SimpleUploadedFile(
-            "test.csv",
-            b"name,email\nJohn,john@example.com",
-            content_type="text/csv"
+        # Store the upload once; rows reference it by its storage-relative name
+        cls.stored_file_name = default_storage.save(
+            "fixtures/test.csv", ContentFile(b"name,email\nJohn,john@example.com")
         )
 
-    def test_process_data_file_view_success(self):
-        """Test successful file processing."""
-        # Create a test data file
-        data_file = UserDataFile.objects.create(
-            user=self.user,
-            service=self.service,
-            file=self.test_file,
-            original_filename="test.csv",
+        # Resolve the AJAX endpoint URLs once for every test
+        cls.endpoint_urls = {
+            name: reverse(name, args=['test-service'])
+            for name in [
+                'services:process_data_file',
+                'services:delete_data_file',
+                'services:process_all_files',
+                'services:delete_all_files',
+            ]
+        }
+
+    def setUp(self):
+        """Log in the test user."""
+        self.client.force_login(self.user)
+
+    @classmethod
+    def _make_data_file(cls, name="test.csv", user=None):
+        """Create a pending UserDataFile for this service (owned by the test user by default)."""
+        return UserDataFile.objects.create(
+            user=user or cls.user,
+            service=cls.service,
+            file=cls.stored_file_name,
+            original_filename=name,
             file_type="csv",
             processing_status="pending"
         )
 
+    def _post_json(self, url, payload=EMPTY_JSON):
+        """POST a JSON body; dict payloads are encoded, bytes are sent as-is."""
+        if not isinstance(payload, bytes):
+            payload = json.dumps(payload).encode()
+        return self.client.post(url, data=payload, content_type='application/json')
+
+    def test_process_data_file_view_success(self):
+        """Test successful file processing."""
+        data_file = self._make_data_file()
+
         # Test the process endpoint
-        response = self.client.post(
-            reverse('services:process_data_file', args=['test-service']),
-            data=json.dumps({'file_id': data_file.id}),
-            content_type='application/json'
-        )
+        response = self._post_json(self.endpoint_urls['services:process_data_file'], {'file_id': data_file.id})
 
         self.assertEqual(response.status_code, 200)
         data = response.json()
@@ -144,11 +174,7 @@ class ServiceViewsTests(TestCase):
 
     def test_process_data_file_view_file_not_found(self):
         """Test process endpoint with non-existent file."""
-        response = self.client.post(
-            reverse('services:process_data_file', args=['test-service']),
-            data=json.dumps({'file_id': 99999}),
-            content_type='application/json'
-        )
+        response = self._post_json(self.endpoint_urls['services:process_data_file'], MISSING_FILE_JSON)
 
         self.assertEqual(response.status_code, 404)
         data = response.json()
@@ -157,11 +183,7 @@ class ServiceViewsTests(TestCase):
 
     def test_process_data_file_view_missing_file_id(self):
         """Test process endpoint without file_id."""
-        response = self.client.post(
-            reverse('services:process_data_file', args=['test-service']),
-            data=json.dumps({}),
-            content_type='application/json'
-        )
+        response = self._post_json(self.endpoint_urls['services:process_data_file'], EMPTY_JSON)
 
         self.assertEqual(response.status_code, 400)
         data = response.json()
@@ -170,22 +192,10 @@ class ServiceViewsTests(TestCase):
 
     def test_delete_data_file_view_success(self):
         """Test successful file deletion."""
-        # Create a test data file
-        data_file = UserDataFile.objects.create(
-            user=self.user,
-            service=self.service,
-            file=self.test_file,
-            original_filename="test.csv",
-            file_type="csv",
-            processing_status="pending"
-        )
+        data_file = self._make_data_file()
 
         # Test the delete endpoint
-        response = self.client.post(
-            reverse('services:delete_data_file', args=['test-service']),
-            data=json.dumps({'file_id': data_file.id}),
-            content_type='application/json'
-        )
+        response = self._post_json(self.endpoint_urls['services:delete_data_file'], {'file_id': data_file.id})
 
         self.assertEqual(response.status_code, 200)
         data = response.json()
@@ -197,11 +207,7 @@ class ServiceViewsTests(TestCase):
 
     def test_delete_data_file_view_file_not_found(self):
         """Test delete endpoint with non-existent file."""
-        response = self.client.post(
-            reverse('services:delete_data_file', args=['test-service']),
-            data=json.dumps({'file_id': 99999}),
-            content_type='application/json'
-        )
+        response = self._post_json(self.endpoint_urls['services:delete_data_file'], MISSING_FILE_JSON)
 
         self.assertEqual(response.status_code, 404)
         data = response.json()
@@ -210,22 +216,21 @@ class ServiceViewsTests(TestCase):
 
     def test_process_all_files_view_success(self):
         """Test successful processing of all pending files."""
-        # Create multiple pending files
-        for i in range(3):
-            UserDataFile.objects.create(
+        # Create multiple pending files, sharing a single stored upload
+        UserDataFile.objects.bulk_create([
+            UserDataFile(
                 user=self.user,
                 service=self.service,
-                file=self.test_file,
+                file=self.stored_file_name,
                 original_filename=f"test{i}.csv",
                 file_type="csv",
                 processing_status="pending"
             )
+            for i in range(3)
+        ])
 
         # Test the process all endpoint
-        response = self.client.post(
-            reverse('services:process_all_files', args=['test-service']),
-            content_type='application/json'
-        )
+        response = self._post_json(self.endpoint_urls['services:process_all_files'])
 
         self.assertEqual(response.status_code, 200)
         data = response.json()
@@ -235,130 +240,131 @@ class ServiceViewsTests(TestCase):
 
     def test_process_all_files_view_no_pending_files(self):
         """Test process all endpoint with no pending files."""
-        response = self.client.post(
-            reverse('services:process_all_files', args=['test-service']),
-            content_type='application/json'
-        )
+        response = self._post_json(self.endpoint_urls['services:process_all_files'])
 
         self.assertEqual(response.status_code, 400)
         data = response.json()
         self.assertFalse(data['success'])
         self.assertIn('No pending files to process', data['error'])
 
-    def test_delete_all_files_view_success(self):
-        """Test successful deletion of all files."""
-        # Create multiple files
-        for i in range(3):
-            UserDataFile.objects.create(
+    @mock.patch("apps.services.tasks.delete_all_user_files.delay")
+    def test_delete_all_files_view_success(self, mock_delay):
+        """Test that deletion of all files is scheduled in the background."""
+        # Create multiple files, sharing a single stored upload
+        data_files = UserDataFile.objects.bulk_create([
+            UserDataFile(
                 user=self.user,
                 service=self.service,
-                file=self.test_file,
+                file=self.stored_file_name,
                 original_filename=f"test{i}.csv",
                 file_type="csv",
                 processing_status="pending"
             )
+            for i in range(3)
+        ])
 
         # Test the delete all endpoint
-        response = self.client.post(
-            reverse('services:delete_all_files', args=['test-service']),
-            content_type='application/json'
-        )
+        response = self._post_json(self.endpoint_urls['services:delete_all_files'])
 
-        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.status_code, 202)
         data = response.json()
         self.assertTrue(data['success'])
         self.assertEqual(data['deleted_count'], 3)
-        self.assertIn('Successfully deleted 3 file(s)', data['message'])
+        self.assertIn('Deletion scheduled for 3 file(s)', data['message'])
+        mock_delay.assert_called_once_with(self.user.id, self.service.id, mock.ANY)
+        self.assertCountEqual(mock_delay.call_args.args[2], [df.id for df in data_files])
+
+    def test_delete_all_user_files_task(self):
+        """Test the background task removes the user's files for the service."""
+        from apps.services.tasks import delete_all_user_files
 
-        # Verify all files were deleted
-        self.assertEqual(UserDataFile.objects.filter(user=self.user).count(), 0)
+        self._make_data_file("a.csv")
+        self._make_data_file("b.csv")
+
+        result = delete_all_user_files(self.user.id, self.service.id)
+
+        self.assertEqual(result, "Deleted 2 file(s)")
+        self.assertFalse(UserDataFile.objects.filter(user=self.user).exists())
 
     def test_delete_all_files_view_no_files(self):
         """Test delete all endpoint with no files."""
-        response = self.client.post(
-            reverse('services:delete_all_files', args=['test-service']),
-            content_type='application/json'
-        )
+        response = self._post_json(self.endpoint_urls['services:delete_all_files'])
 
         self.assertEqual(response.status_code, 400)
         data = response.json()
         self.assertFalse(data['success'])
         self.assertIn('No files to delete', data['error'])
 
-    def test_views_require_authentication(self):
-        """Test that all views require authentication."""
+    def _assert_login_required(self, endpoint_name, payload=EMPTY_JSON):
         self.client.logout()
-        
-        endpoints = [
-            ('services:process_data_file', {'file_id': 1}),
-            ('services:delete_data_file', {'file_id': 1}),
-            ('services:process_all_files', {}),
-            ('services:delete_all_files', {}),
-        ]
-        
-        for endpoint_name, data in endpoints:
-            with self.subTest(endpoint=endpoint_name):
-                response = self.client.post(
-                    reverse(endpoint_name, args=['test-service']),
-                    data=json.dumps(data),
-                    content_type='application/json'
-                )
-                # Should redirect to login page
-                self.assertEqual(response.status_code, 302)
-
-    def test_views_require_post_method(self):
-        """Test that all views require POST method."""
-        endpoints = [
-            'services:process_data_file',
-            'services:delete_data_file', 
-            'services:process_all_files',
-            'services:delete_all_files',
-        ]
-        
-        for endpoint_name in endpoints:
-            with self.subTest(endpoint=endpoint_name):
-                response = self.client.get(
-                    reverse(endpoint_name, args=['test-service'])
-                )
-                self.assertEqual(response.status_code, 405)  # Method Not Allowed
+        response = self._post_json(self.endpoint_urls[endpoint_name], payload)
+        # Should redirect to login page
+        self.assertEqual(response.status_code, 302)
+
+    def _assert_post_required(self, endpoint_name):
+        response = self.client.get(self.endpoint_urls[endpoint_name])
+        self.assertEqual(response.status_code, 405)  # Method Not Allowed
+
+    def test_process_data_file_requires_authentication(self):
+        self._assert_login_required('services:process_data_file', {'file_id': 1})
+
+    def test_delete_data_file_requires_authentication(self):
+        self._assert_login_required('services:delete_data_file', {'file_id': 1})
+
+    def test_process_all_files_requires_authentication(self):
+        self._assert_login_required('services:process_all_files')
+
+    def test_delete_all_files_requires_authentication(self):
+        self._assert_login_required('services:delete_all_files')
+
+    def test_process_data_file_requires_post(self):
+        self._assert_post_required('services:process_data_file')
+
+    def test_delete_data_file_requires_post(self):
+        self._assert_post_required('services:delete_data_file')
+
+    def test_process_all_files_requires_post(self):
+        self._assert_post_required('services:process_all_files')
+
+    def test_delete_all_files_requires_post(self):
+        self._assert_post_required('services:delete_all_files')
 
     def test_user_can_only_access_own_files(self):
         """Test that users can only access their own files."""
         # Create another user and file
-        other_user = User.objects.create_user(
-            username="other@example.com",
-            email="other@example.com",
-            password="testpass123"
-        )
+        other_user = User(username="other@example.com", email="other@example.com")
+        other_user.set_unusable_password()
+        other_user.save()
         
-        other_file = UserDataFile.objects.create(
-            user=other_user,
-            service=self.service,
-            file=self.test_file,
-            original_filename="other.csv",
-            file_type="csv",
-            processing_status="pending"
-        )
+        other_file = self._make_data_file("other.csv", user=other_user)
 
         # Try to process the other user's file
-        response = self.client.post(
-            reverse('services:process_data_file', args=['test-service']),
-            data=json.dumps({'file_id': other_file.id}),
-            content_type='application/json'
-        )
+        response = self._post_json(self.endpoint_urls['services:process_data_file'], {'file_id': other_file.id})
 
         self.assertEqual(response.status_code, 404)
         data = response.json()
         self.assertFalse(data['success'])
         self.assertIn('File not found', data['error'])
 
+    def test_get_processing_status(self):
+        """Test the status endpoint reports the file's status to its owner only."""
+        data_file = self._make_data_file()
+        url = reverse('services:get_processing_status', args=[data_file.id])
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'pending', 'log': data_file.processing_log, 'processed_at': None})
+
+        other_user = User(username="other@example.com", email="other@example.com")
+        other_user.set_unusable_password()
+        other_user.save()
+        self.client.force_login(other_user)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
     def test_invalid_json_handling(self):
         """Test that views handle invalid JSON gracefully."""
-        response = self.client.post(
-            reverse('services:process_data_file', args=['test-service']),
-            data="invalid json",
-            content_type='application/json'
-        )
+        response = self._post_json(self.endpoint_urls['services:process_data_file'], INVALID_JSON)
 
         self.assertEqual(response.status_code, 400)
         data = response.json()
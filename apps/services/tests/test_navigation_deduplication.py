@@ -1,3 +1,9 @@
+# Keep these classes on django.test.TestCase: each test rolls back to a savepoint, whereas
+# TransactionTestCase/LiveServerTestCase truncate every table (including dj-stripe's) per test.
+# Enforced by the services-tests-use-testcase pre-commit hook.
+
+from uuid import uuid4
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.template import Template, Context
@@ -8,51 +14,63 @@ from apps.services.templatetags.services_tags import user_navigation_items
 
 User = get_user_model()
 
+# One query for subscriptions and one for accessible services, plus a single prefetch of
+# subscription items (with price and product) when any subscription exists.
+# If these grow, user_navigation_items has regressed into per-row queries.
+NAV_QUERIES_WITHOUT_SUBSCRIPTIONS = 2
+NAV_QUERIES_WITH_SUBSCRIPTIONS = 3
+
 
 class NavigationDeduplicationTests(TestCase):
     """Test cases for navigation deduplication logic"""
     
-    def setUp(self):
-        """Set up test data"""
-        self.user = User.objects.create_user(
-            username='testuser',
-            email='test@example.com',
-            password='testpass123'
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.navigation_template = Template(
+            '{% load services_tags %}'
+            '{% user_navigation_items user as navigation_items %}'
+            '{% for item in navigation_items %}{{ item.name }} ({{ item.type }}) -> {{ item.url }}\n{% endfor %}'
         )
-        
-        # Create customer for user
-        self.customer = Customer.objects.create(
+
+    @classmethod
+    def setUpTestData(cls):
+        """Set up test data"""
+        # Create the customer first so the user is saved with it in a single write
+        cls.customer = Customer.objects.create(
             id='cus_test123',
-            email=self.user.email
+            email='test@example.com'
         )
-        self.user.customer = self.customer
-        self.user.save()
+        # No test here logs in, so skip password hashing entirely
+        cls.user = User(username='testuser', email='test@example.com', customer=cls.customer)
+        cls.user.set_unusable_password()
+        cls.user.save()
         
         # Create test products
-        self.product1 = Product.objects.create(
-            id='prod_test123',
+        cls.product1 = Product.objects.create(
+            id=f'prod_{uuid4().hex}',
             name='Test Product 1',
             active=True
         )
         
-        self.product2 = Product.objects.create(
-            id='prod_test456',
+        cls.product2 = Product.objects.create(
+            id=f'prod_{uuid4().hex}',
             name='Test Product 2',
             active=True
         )
         
         # Create test services
-        self.service1 = Service.objects.create(
+        cls.service1 = Service.objects.create(
             name='Test Service 1',
             slug='test-service-1',
-            stripe_product=self.product1,
+            stripe_product=cls.product1,
             icon='fa fa-cube'
         )
         
-        self.service2 = Service.objects.create(
+        cls.service2 = Service.objects.create(
             name='Test Service 2',
             slug='test-service-2',
-            stripe_product=self.product2,
+            stripe_product=cls.product2,
             icon='fa fa-star'
         )
     
@@ -65,7 +83,8 @@ class NavigationDeduplicationTests(TestCase):
             is_active=True
         )
         
-        nav_items = user_navigation_items(self.user)
+        with self.assertNumQueries(NAV_QUERIES_WITHOUT_SUBSCRIPTIONS):
+            nav_items = user_navigation_items(self.user)
         
         self.assertEqual(len(nav_items), 1)
         item = nav_items[0]
@@ -83,7 +102,7 @@ class NavigationDeduplicationTests(TestCase):
         )
         
         price = Price.objects.create(
-            id='price_test123',
+            id=f'price_{uuid4().hex}',
             product=self.product1,
             unit_amount=1000,
             currency='usd'
@@ -96,7 +115,8 @@ class NavigationDeduplicationTests(TestCase):
             quantity=1
         )
         
-        nav_items = user_navigation_items(self.user)
+        with self.assertNumQueries(NAV_QUERIES_WITH_SUBSCRIPTIONS):
+            nav_items = user_navigation_items(self.user)
         
         self.assertEqual(len(nav_items), 1)
         item = nav_items[0]
@@ -121,7 +141,7 @@ class NavigationDeduplicationTests(TestCase):
         )
         
         price = Price.objects.create(
-            id='price_test123',
+            id=f'price_{uuid4().hex}',
             product=self.product1,
             unit_amount=1000,
             currency='usd'
@@ -134,7 +154,8 @@ class NavigationDeduplicationTests(TestCase):
             quantity=1
         )
         
-        nav_items = user_navigation_items(self.user)
+        with self.assertNumQueries(NAV_QUERIES_WITH_SUBSCRIPTIONS):
+            nav_items = user_navigation_items(self.user)
         
         # Should only show service, not subscription (deduplication)
         self.assertEqual(len(nav_items), 1)
@@ -160,7 +181,7 @@ class NavigationDeduplicationTests(TestCase):
         )
         
         price = Price.objects.create(
-            id='price_test123',
+            id=f'price_{uuid4().hex}',
             product=self.product2,
             unit_amount=1000,
             currency='usd'
@@ -173,7 +194,8 @@ class NavigationDeduplicationTests(TestCase):
             quantity=1
         )
         
-        nav_items = user_navigation_items(self.user)
+        with self.assertNumQueries(NAV_QUERIES_WITH_SUBSCRIPTIONS):
+            nav_items = user_navigation_items(self.user)
         
         # Should show both: service1 and subscription for product2
         self.assertEqual(len(nav_items), 2)
@@ -187,9 +209,24 @@ class NavigationDeduplicationTests(TestCase):
     
     def test_navigation_items_no_access(self):
         """Test navigation when user has no access to anything"""
-        nav_items = user_navigation_items(self.user)
+        with self.assertNumQueries(NAV_QUERIES_WITHOUT_SUBSCRIPTIONS):
+            nav_items = user_navigation_items(self.user)
         self.assertEqual(len(nav_items), 0)
     
+    def test_navigation_items_memoized_per_user_instance(self):
+        """Test repeated lookups for the same user object (one request) hit the database once"""
+        UserServiceAccess.objects.create(
+            user=self.user,
+            service=self.service1,
+            is_active=True
+        )
+        
+        first_items = user_navigation_items(self.user)
+        with self.assertNumQueries(0):
+            second_items = user_navigation_items(self.user)
+        
+        self.assertEqual(first_items, second_items)
+    
     def test_navigation_items_anonymous_user(self):
         """Test navigation for anonymous user"""
         anonymous_user = User()
@@ -205,17 +242,10 @@ class NavigationDeduplicationTests(TestCase):
             is_active=True
         )
         
-        template_content = '''
-        {% load services_tags %}
-        {% user_navigation_items user as navigation_items %}
-        {% for item in navigation_items %}
-          {{ item.name }} ({{ item.type }}) -> {{ item.url }}
-        {% endfor %}
-        '''
-        
-        template = Template(template_content)
-        context = Context({'user': self.user})
-        result = template.render(context)
-        
+        items = user_navigation_items(self.user)
+        self.assertEqual(items[0]['type'], 'service')
+
+        # Single smoke test of the template tag rendering path
+        result = self.navigation_template.render(Context({'user': self.user}))
         self.assertIn('Test Service 1 (service)', result)
         self.assertIn('services/test-service-1', result)
@@ -13,9 +13,6 @@ urlpatterns = [
     path('analytics/', views.analytics_dashboard, name='analytics_dashboard'),
     path('api/', views.api_access, name='api_access'),
     
-    # Generic service URL for dynamic services
-    path('<slug:service_slug>/', views.generic_service_view, name='generic_service'),
-    
     # File upload and processing endpoints
     path('<slug:service_slug>/upload/', views.upload_data_file, name='upload_data_file'),
     path('<slug:service_slug>/process/', views.process_data_file, name='process_data_file'),
@@ -24,4 +21,7 @@ urlpatterns = [
     path('<slug:service_slug>/delete-all/', views.delete_all_files, name='delete_all_files'),
     path('<slug:service_slug>/delete-reports/', views.delete_processed_reports, name='delete_processed_reports'),
     path('file/<int:file_id>/status/', views.get_processing_status, name='get_processing_status'),
+    
+    # Generic service URL for dynamic services - keep last so the specific routes above resolve first
+    path('<slug:service_slug>/', views.generic_service_view, name='generic_service'),
 ]
@@ -1,17 +1,35 @@
+import logging
+
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, get_object_or_404, redirect
-from django.utils.translation import gettext_lazy as _
-from django.http import JsonResponse
+from django.core.cache import cache
+from django.http import Http404
+from django.shortcuts import redirect, render
 from django.urls import reverse
-from django.contrib import messages
-from django.views.decorators.http import require_http_methods
+from django.utils.html import format_html_join
+from django.utils.safestring import mark_safe
+from django.utils.translation import gettext_lazy as _
 from django.views.decorators.csrf import csrf_exempt
-import json
+from django.views.decorators.http import require_http_methods
 
-from .models import Service, UserDataFile, UserProcessedData
-from .decorators import service_access_required
-from .helpers import get_user_accessible_services
+from .decorators import json_body, service_access_required
 from .forms import DataFileUploadForm
+from .helpers import (
+    cache_processing_status,
+    get_active_service,
+    get_cached_processing_status,
+    get_user_accessible_services,
+)
+from .models import Service, UserDataFile, UserProcessedData
+from .responses import CompactJsonResponse
+
+logger = logging.getLogger(__name__)
+
+# Sentinel distinguishing a cache miss from a cached "no custom template" (None)
+_MISSING = object()
+USER_TEMPLATE_CACHE_TIMEOUT = 300
+FILE_ID_REQUIRED = {'file_id': 'File ID is required'}
 
 
 @login_required
@@ -31,64 +49,66 @@ def services_home(request):
     return render(request, 'services/services_home.html', context)
 
 
-@service_access_required('software-service-1')
-def software_service_1(request):
+def get_active_service_or_404(service_slug):
     """
-    Example service 1 - replace with your actual service logic.
+    Cached equivalent of get_object_or_404(Service, slug=service_slug, is_active=True).
     """
-    service = get_object_or_404(Service, slug='software-service-1')
-    
-    context = {
-        'service': service,
-        'active_tab': 'service-1'
-    }
-    
-    return render(request, 'services/service_template.html', context)
+    service = get_active_service(service_slug)
+    if service is None:
+        raise Http404("No active service matches the given slug.")
+    return service
 
 
-@service_access_required('software-service-2')
-def software_service_2(request):
+def _service_page(service_slug, active_tab):
     """
-    Example service 2 - replace with your actual service logic.
+    Build a view for a fixed-slug service page that renders the shared service template.
     """
-    service = get_object_or_404(Service, slug='software-service-2')
-    
-    context = {
-        'service': service,
-        'active_tab': 'service-2'
-    }
-    
-    return render(request, 'services/service_template.html', context)
+    @service_access_required(service_slug)
+    def service_page(request):
+        service = get_active_service_or_404(service_slug)
+        
+        context = {
+            'service': service,
+            'active_tab': active_tab
+        }
+        
+        return render(request, 'services/service_template.html', context)
+    return service_page
 
 
-@service_access_required('analytics-dashboard')
-def analytics_dashboard(request):
-    """
-    Example analytics service - replace with your actual analytics logic.
-    """
-    service = get_object_or_404(Service, slug='analytics-dashboard')
-    
-    context = {
-        'service': service,
-        'active_tab': 'analytics'
-    }
-    
-    return render(request, 'services/service_template.html', context)
+# Example services - replace with your actual service logic.
+software_service_1 = _service_page('software-service-1', 'service-1')
+software_service_2 = _service_page('software-service-2', 'service-2')
+analytics_dashboard = _service_page('analytics-dashboard', 'analytics')
+api_access = _service_page('api-access', 'api')
 
 
-@service_access_required('api-access')
-def api_access(request):
+def get_user_template_path(user, service_name):
     """
-    Example API access service - replace with your actual API logic.
+    Resolve the custom template for a user's service, relative to USER_PROGRAMS_DIR.
+    
+    Priority 1 is a user-specific template, priority 2 a service-level template shared
+    across all users. Returns None when neither exists. The result is cached for
+    USER_TEMPLATE_CACHE_TIMEOUT seconds so page views don't stat the filesystem; newly
+    deployed templates are picked up once the entry expires.
     """
-    service = get_object_or_404(Service, slug='api-access')
+    user_id = user.id
+    cache_key = f"svc_tpl:{user_id}:{service_name}"
+    user_template_path = cache.get(cache_key, _MISSING)
+    if user_template_path is not _MISSING:
+        return user_template_path
     
-    context = {
-        'service': service,
-        'active_tab': 'api'
-    }
+    user_template_path = None
+    if (settings.USER_PROGRAMS_DIR / f"user_{user_id}" / service_name / "template.html").exists():
+        user_template_path = f"user_{user_id}/{service_name}/template.html"
+    elif (settings.USER_PROGRAMS_DIR / service_name / "template.html").exists():
+        user_template_path = f"{service_name}/template.html"
     
-    return render(request, 'services/service_template.html', context)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Custom template for user {user_id} / {service_name}: {user_template_path or 'default'}")
+    
+    cache.set(cache_key, user_template_path, USER_TEMPLATE_CACHE_TIMEOUT)
+    return user_template_path
 
 
 # Generic service view that can handle any service by slug
@@ -97,7 +117,7 @@ def generic_service_view(request, service_slug):
     Generic view for any service - uses the service_access_required decorator dynamically.
     Handles file uploads and displays user data.
     """
-    service = get_object_or_404(Service, slug=service_slug, is_active=True)
+    service = get_active_service_or_404(service_slug)
     
     # Check access manually since we can't use the decorator with dynamic slugs
     from .helpers import user_has_service_access
@@ -122,9 +142,11 @@ def generic_service_view(request, service_slug):
             
             return redirect('services:generic_service', service_slug=service_slug)
         else:
-            for field, errors in form.errors.items():
-                for error in errors:
-                    messages.error(request, f"{field}: {error}")
+            # One message for all errors keeps it to a single write to the message storage
+            messages.error(request, format_html_join(
+                mark_safe("<br>"), "{}: {}",
+                ((field, error) for field, errors in form.errors.items() for error in errors)
+            ))
     else:
         form = DataFileUploadForm(user=request.user, service=service)
     
@@ -132,39 +154,16 @@ def generic_service_view(request, service_slug):
     user_data_files = UserDataFile.objects.filter(
         user=request.user, 
         service=service
-    ).order_by('-created_at')[:10]  # Show last 10 files
+    ).select_related('service', 'user').order_by('-created_at')[:10]  # Show last 10 files
     
-    # Get processed data
+    # Get processed data (the template renders data.data_file.* for every row)
     processed_data = UserProcessedData.objects.filter(
         data_file__user=request.user,
         data_file__service=service
-    ).order_by('-created_at')[:5]  # Show last 5 processed files
+    ).select_related('data_file__service', 'data_file__user').order_by('-created_at')[:5]  # Show last 5 processed files
     
     # Get user's custom template if it exists
-    from django.conf import settings
-    from pathlib import Path
-    import logging
-    
-    logger = logging.getLogger(__name__)
-    user_template_path = None
-    
-    # Priority 1: Check if user has a user-specific template
-    user_specific_template = settings.USER_PROGRAMS_DIR / f"user_{request.user.id}" / service.name / "template.html"
-    logger.info(f"Looking for user-specific template at: {user_specific_template}")
-    
-    if user_specific_template.exists():
-        user_template_path = f"user_{request.user.id}/{service.name}/template.html"
-        logger.info(f"Found user-specific template: {user_template_path}")
-    else:
-        # Priority 2: Check for service-level template (shared across all users)
-        service_level_template = settings.USER_PROGRAMS_DIR / service.name / "template.html"
-        logger.info(f"Looking for service-level template at: {service_level_template}")
-        
-        if service_level_template.exists():
-            user_template_path = f"{service.name}/template.html"
-            logger.info(f"Found service-level template: {user_template_path}")
-        else:
-            logger.info("No custom template found, will use default")
+    user_template_path = get_user_template_path(request.user, service.name)
     
     context = {
         'service': service,
@@ -185,12 +184,12 @@ def upload_data_file(request, service_slug):
     """
     AJAX endpoint for file uploads.
     """
-    service = get_object_or_404(Service, slug=service_slug, is_active=True)
+    service = get_active_service_or_404(service_slug)
     
     # Check access
     from .helpers import user_has_service_access
     if not user_has_service_access(request.user, service_slug):
-        return JsonResponse({
+        return CompactJsonResponse({
             'success': False,
             'error': 'Access denied'
         }, status=403)
@@ -200,13 +199,13 @@ def upload_data_file(request, service_slug):
     if form.is_valid():
         data_file = form.save()
         
-        return JsonResponse({
+        return CompactJsonResponse({
             'success': True,
             'file_id': data_file.id,
             'message': 'File uploaded successfully! Status: Pending.'
         })
     else:
-        return JsonResponse({
+        return CompactJsonResponse({
             'success': False,
             'errors': form.errors
         }, status=400)
@@ -216,33 +215,43 @@ def upload_data_file(request, service_slug):
 def get_processing_status(request, file_id):
     """
     Get the processing status of a data file.
+    
+    Polled frequently, so the status is served from the cache that the UserDataFile
+    post_save signal refreshes on every transition; the database is only read on a miss.
     """
-    try:
-        data_file = UserDataFile.objects.get(id=file_id, user=request.user)
-        return JsonResponse({
-            'status': data_file.processing_status,
-            'log': data_file.processing_log,
-            'processed_at': data_file.processed_at.isoformat() if data_file.processed_at else None
-        })
-    except UserDataFile.DoesNotExist:
-        return JsonResponse({'error': 'File not found'}, status=404)
+    status = get_cached_processing_status(file_id)
+    if status is None:
+        try:
+            # Load only the columns the response needs
+            data_file = UserDataFile.objects.only(
+                'user_id', 'processing_status', 'processing_log', 'processed_at'
+            ).get(id=file_id, user=request.user)
+        except UserDataFile.DoesNotExist:
+            return CompactJsonResponse({'error': 'File not found'}, status=404)
+        status = cache_processing_status(data_file)
+    elif status['user_id'] != request.user.id:
+        return CompactJsonResponse({'error': 'File not found'}, status=404)
+    
+    return CompactJsonResponse({
+        'status': status['status'],
+        'log': status['log'],
+        'processed_at': status['processed_at'],
+    })
 
 
 @login_required
 @require_http_methods(["POST"])
-def process_data_file(request, service_slug):
+@json_body(required=FILE_ID_REQUIRED)
+def process_data_file(request, service_slug, payload):
     """
     Process a specific data file.
     """
     try:
-        data = json.loads(request.body)
-        file_id = data.get('file_id')
+        file_id = payload['file_id']
         
-        if not file_id:
-            return JsonResponse({'success': False, 'error': 'File ID is required'}, status=400)
-        
-        # Get the file and verify ownership
-        UserDataFile.objects.get(id=file_id, user=request.user)
+        # Verify ownership without loading the row
+        if not UserDataFile.objects.filter(id=file_id, user=request.user).exists():
+            return CompactJsonResponse({'success': False, 'error': 'File not found'}, status=404)
         
         # Import the task here to avoid circular imports
         from .tasks import process_user_data_file
@@ -250,28 +259,21 @@ def process_data_file(request, service_slug):
         # Start the processing task
         process_user_data_file.delay(file_id)
         
-        return JsonResponse({'success': True, 'message': 'Processing started'})
+        return CompactJsonResponse({'success': True, 'message': 'Processing started'})
         
-    except UserDataFile.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'File not found'}, status=404)
-    except json.JSONDecodeError:
-        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+        return CompactJsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
 @login_required
 @require_http_methods(["POST"])
-def delete_data_file(request, service_slug):
+@json_body(required=FILE_ID_REQUIRED)
+def delete_data_file(request, service_slug, payload):
     """
     Delete a specific data file.
     """
     try:
-        data = json.loads(request.body)
-        file_id = data.get('file_id')
-        
-        if not file_id:
-            return JsonResponse({'success': False, 'error': 'File ID is required'}, status=400)
+        file_id = payload['file_id']
         
         # Get the file and verify ownership
         data_file = UserDataFile.objects.get(id=file_id, user=request.user)
@@ -290,14 +292,12 @@ def delete_data_file(request, service_slug):
         # Delete the database record
         data_file.delete()
         
-        return JsonResponse({'success': True, 'message': 'File deleted successfully'})
+        return CompactJsonResponse({'success': True, 'message': 'File deleted successfully'})
         
     except UserDataFile.DoesNotExist:
-        return JsonResponse({'success': False, 'error': 'File not found'}, status=404)
-    except json.JSONDecodeError:
-        return JsonResponse({'success': False, 'error': 'Invalid JSON'}, status=400)
+        return CompactJsonResponse({'success': False, 'error': 'File not found'}, status=404)
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+        return CompactJsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
 @login_required
@@ -311,29 +311,30 @@ def process_all_files(request, service_slug):
         from .tasks import process_all_user_files
         
         # Get service
-        service = get_object_or_404(Service, slug=service_slug)
+        service = get_active_service_or_404(service_slug)
 
-        # Kick off one batch job for this user+service
-        process_all_user_files.delay(request.user.id, service_slug)
-
-        # Respond with count for UX - count ALL files for this service
-        file_count = UserDataFile.objects.filter(
+        # One query serves as the empty check, the count for UX and the batch handed to the task
+        file_ids = list(UserDataFile.objects.filter(
             user=request.user, service=service
-        ).count()
+        ).values_list('id', flat=True))
+        file_count = len(file_ids)
         if file_count == 0:
             error_msg = 'No files to process. Please upload files first.'
-            return JsonResponse(
+            return CompactJsonResponse(
                 {'success': False, 'error': error_msg}, status=400
             )
 
-        return JsonResponse({
+        # Kick off one batch job for this user+service
+        process_all_user_files.delay(request.user.id, service_slug, file_ids)
+
+        return CompactJsonResponse({
             'success': True,
             'message': f'Processing started for {file_count} file(s)',
             'file_count': file_count
         })
         
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+        return CompactJsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
 @login_required
@@ -341,39 +342,32 @@ def process_all_files(request, service_slug):
 def delete_all_files(request, service_slug):
     """
     Delete all files for a user.
+    
+    Storage and row deletion run in a background task, so the response is 202 Accepted.
     """
     try:
-        # Scope to this service only
-        service = get_object_or_404(Service, slug=service_slug, is_active=True)
-        user_files = UserDataFile.objects.filter(user=request.user, service=service)
-        
-        if not user_files.exists():
-            return JsonResponse({'success': False, 'error': 'No files to delete'}, status=400)
+        # Import the task here to avoid circular imports
+        from .tasks import delete_all_user_files
         
-        file_count = user_files.count()
+        # Scope to this service only
+        service = get_active_service_or_404(service_slug)
+        file_ids = list(UserDataFile.objects.filter(
+            user=request.user, service=service
+        ).values_list('id', flat=True))
+        file_count = len(file_ids)
+        if file_count == 0:
+            return CompactJsonResponse({'success': False, 'error': 'No files to delete'}, status=400)
 
-        # Delete associated processed data first (to ensure storage cleanup)
-        processed_qs = UserProcessedData.objects.filter(data_file__in=user_files)
-        for processed in processed_qs:
-            # delete storage file
-            if processed.processed_file:
-                processed.processed_file.delete(save=False)
-            processed.delete()
+        delete_all_user_files.delay(request.user.id, service.id, file_ids)
         
-        # Delete uploaded files and their storage objects
-        for df in user_files:
-            if df.file:
-                df.file.delete(save=False)
-            df.delete()
-        
-        return JsonResponse({
+        return CompactJsonResponse({
             'success': True, 
-            'message': f'Successfully deleted {file_count} file(s)',
+            'message': f'Deletion scheduled for {file_count} file(s)',
             'deleted_count': file_count
-        })
+        }, status=202)
         
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+        return CompactJsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
 @login_required
@@ -383,14 +377,14 @@ def delete_processed_reports(request, service_slug):
     Delete all processed (verification) reports for the current user/service.
     """
     try:
-        service = get_object_or_404(Service, slug=service_slug, is_active=True)
+        service = get_active_service_or_404(service_slug)
         reports = UserProcessedData.objects.filter(
             data_file__user=request.user,
             data_file__service=service
         )
 
         if not reports.exists():
-            return JsonResponse({'success': False, 'error': 'No reports to delete'}, status=400)
+            return CompactJsonResponse({'success': False, 'error': 'No reports to delete'}, status=400)
 
         deleted_count = 0
         for report in reports:
@@ -402,7 +396,7 @@ def delete_processed_reports(request, service_slug):
             report.delete()
             deleted_count += 1
 
-        return JsonResponse({'success': True, 'message': f'Deleted {deleted_count} report(s).'})
+        return CompactJsonResponse({'success': True, 'message': f'Deleted {deleted_count} report(s).'})
 
     except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+        return CompactJsonResponse({'success': False, 'error': str(e)}, status=500)
@@ -1,8 +1,43 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import SubscriptionRequest, SubscriptionAvailability, ProductDemoLink
+from django.utils.safestring import mark_safe
+
 from apps.users.models import CustomUser
 
+from .helpers import STRIPE_PRODUCT_CACHE_TIMEOUT, stripe_product_cache_key
+from .models import ProductDemoLink, SubscriptionAvailability, SubscriptionRequest
+
+# Static changelist cells, built once at import instead of formatted per row
+REQUEST_TYPE_DEMO_HTML = mark_safe('<span style="color: #6366f1; font-weight: bold;">🎬 Demo</span>')
+REQUEST_TYPE_SUBSCRIPTION_HTML = mark_safe('<span style="color: #10b981; font-weight: bold;">📦 Subscription</span>')
+AVAILABLE_HTML = mark_safe('<span style="color: green; font-weight: bold;">✓ Available</span>')
+REQUEST_ONLY_HTML = mark_safe('<span style="color: orange; font-weight: bold;">⚠ Request Only</span>')
+SCOPE_USER_HTML = mark_safe('<span style="color: blue;">User-Specific</span>')
+SCOPE_GLOBAL_HTML = mark_safe('<span style="color: purple;">Global</span>')
+GLOBAL_USER_HTML = mark_safe('<strong>Global</strong>')
+
+DEMO_LINK_TEMPLATE = '<a href="{}" target="{}" style="color: #3b82f6;">🔗 {}</a>'
+DEMO_URL_LABEL_LENGTH = 50
+# Indexed by ProductDemoLink.open_in_new_tab
+LINK_TARGETS = ('_self', '_blank')
+
+STATUS_HTML_TEMPLATE = '<span style="color: {}; font-weight: bold;">{} {}</span>'
+STATUS_COLORS = {
+    'pending': 'orange',
+    'contacted': 'blue',
+    'approved': 'green',
+    'rejected': 'red'
+}
+STATUS_ICONS = {
+    'pending': '⏳',
+    'contacted': '📞',
+    'approved': '✅',
+    'rejected': '❌'
+}
+
 
 @admin.register(SubscriptionRequest)
 class SubscriptionRequestAdmin(admin.ModelAdmin):
@@ -12,6 +47,8 @@ class SubscriptionRequestAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at', 'product_info']
     date_hierarchy = 'created_at'
     ordering = ['-created_at']
+    # Skip the unfiltered COUNT(*) shown next to filtered results
+    show_full_result_count = False
     
     fieldsets = (
         ('Request Information', {
@@ -36,6 +73,9 @@ class SubscriptionRequestAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+    
     def user_info(self, obj):
         """Display user information with better formatting"""
         full_name = obj.user.get_full_name()
@@ -48,31 +88,17 @@ class SubscriptionRequestAdmin(admin.ModelAdmin):
     def request_type_display(self, obj):
         """Display request type with icons"""
         if obj.request_type == 'demo':
-            return format_html('<span style="color: #6366f1; font-weight: bold;">🎬 Demo</span>')
-        else:
-            return format_html('<span style="color: #10b981; font-weight: bold;">📦 Subscription</span>')
+            return REQUEST_TYPE_DEMO_HTML
+        return REQUEST_TYPE_SUBSCRIPTION_HTML
     request_type_display.short_description = 'Type'
     request_type_display.admin_order_field = 'request_type'
     
     def status_display(self, obj):
         """Display status with colored indicators"""
-        status_colors = {
-            'pending': 'orange',
-            'contacted': 'blue', 
-            'approved': 'green',
-            'rejected': 'red'
-        }
-        status_icons = {
-            'pending': '⏳',
-            'contacted': '📞',
-            'approved': '✅',
-            'rejected': '❌'
-        }
-        color = status_colors.get(obj.status, 'black')
-        icon = status_icons.get(obj.status, '')
+        # The label is translated per request, so only the colour/icon lookups are static
         return format_html(
-            '<span style="color: {}; font-weight: bold;">{} {}</span>',
-            color, icon, obj.get_status_display()
+            STATUS_HTML_TEMPLATE,
+            STATUS_COLORS.get(obj.status, 'black'), STATUS_ICONS.get(obj.status, ''), obj.get_status_display()
         )
     status_display.short_description = 'Status'
     status_display.admin_order_field = 'status'
@@ -84,31 +110,45 @@ class SubscriptionRequestAdmin(admin.ModelAdmin):
         return format_html('<a href="{}">👤 View Profile</a>', url)
     view_user_link.short_description = 'User Profile'
     
+    def _get_stripe_product(self, obj):
+        """
+        Get the Stripe Product for a request, or None if it doesn't exist.
+        
+        Memoized on the instance for the rest of the render, and cached across requests because
+        products change rarely (the product.updated/deleted webhooks clear the shared entry).
+        """
+        if not hasattr(obj, '_stripe_product'):
+            from djstripe.models import Product
+            obj._stripe_product = cache.get_or_set(
+                stripe_product_cache_key(obj.product_stripe_id),
+                lambda: Product.objects.filter(id=obj.product_stripe_id).first(),
+                timeout=STRIPE_PRODUCT_CACHE_TIMEOUT,
+            )
+        return obj._stripe_product
+    
     def product_info(self, obj):
         """Display detailed product information"""
         if obj.pk:  # Only for existing objects
-            try:
-                from djstripe.models import Product
-                product = Product.objects.get(id=obj.product_stripe_id)
-                return format_html(
-                    '<div style="background: #f8f9fa; padding: 10px; border-radius: 5px;">'
-                    '<strong>Product:</strong> {}<br>'
-                    '<strong>Stripe ID:</strong> {}<br>'
-                    '<strong>Active:</strong> {}<br>'
-                    '<strong>Description:</strong> {}'
-                    '</div>',
-                    product.name,
-                    product.id,
-                    'Yes' if product.active else 'No',
-                    product.description or 'No description'
-                )
-            except Product.DoesNotExist:
+            product = self._get_stripe_product(obj)
+            if product is None:
                 return format_html(
                     '<div style="background: #fff3cd; padding: 10px; border-radius: 5px; color: #856404;">'
                     '⚠️ Product not found in Stripe. ID: {}'
                     '</div>',
                     obj.product_stripe_id
                 )
+            return format_html(
+                '<div style="background: #f8f9fa; padding: 10px; border-radius: 5px;">'
+                '<strong>Product:</strong> {}<br>'
+                '<strong>Stripe ID:</strong> {}<br>'
+                '<strong>Active:</strong> {}<br>'
+                '<strong>Description:</strong> {}'
+                '</div>',
+                product.name,
+                product.id,
+                'Yes' if product.active else 'No',
+                product.description or 'No description'
+            )
         return 'Product information will appear after saving.'
     product_info.short_description = 'Product Details'
     
@@ -119,22 +159,68 @@ class SubscriptionRequestAdmin(admin.ModelAdmin):
         self.message_user(request, f'{updated} requests marked as contacted.')
     mark_contacted.short_description = '📞 Mark as contacted'
     
-    def mark_approved(self, request, queryset):
-        """Approve all types of requests - handles both subscription and demo"""
-        updated_count = 0
+    def _approve(self, queryset):
+        """
+        Approve the requests in queryset, doing the approval signal's work in bulk.
+        
+        Stripe products are resolved with one in_bulk query rather than one lookup per request.
+        Returns (updated_count, subscription_count, demo_count, missing_product_ids).
+        """
+        from djstripe.models import Product
+
+        from .signals import _send_demo_approval_email
+        
+        requests = list(queryset.select_related('user'))
+        products = Product.objects.in_bulk({req.product_stripe_id for req in requests}, field_name='id')
+        
+        # update() bypasses the post_save approval signal, so its work is done in bulk below.
+        # Updating by the loaded primary keys avoids re-evaluating the changelist filters and search joins.
+        updated_count = SubscriptionRequest.objects.filter(pk__in=[req.pk for req in requests]).update(
+            status='approved', updated_at=timezone.now()
+        )
         demo_count = 0
         subscription_count = 0
         
-        for req in queryset:
-            # Update the request status - this triggers the signal
-            req.status = 'approved'
-            req.save()
-            updated_count += 1
-            
+        availabilities = {}
+        missing_product_ids = set()
+        for req in requests:
+            product = products.get(req.product_stripe_id)
+            if product is None:
+                missing_product_ids.add(req.product_stripe_id)
             if req.request_type == 'demo':
                 demo_count += 1
+                if product:
+                    _send_demo_approval_email(req, product)
             else:
                 subscription_count += 1
+                if product:
+                    # Keyed on the unique (product, user) pair so duplicate requests upsert once
+                    availabilities[(product.pk, req.user_id)] = SubscriptionAvailability(
+                        stripe_product=product,
+                        user_id=req.user_id,
+                        make_subscription_available=True,
+                    )
+        
+        SubscriptionAvailability.objects.bulk_create(
+            availabilities.values(),
+            update_conflicts=True,
+            unique_fields=['stripe_product', 'user'],
+            update_fields=['make_subscription_available', 'updated_at'],
+        )
+        return updated_count, subscription_count, demo_count, sorted(missing_product_ids)
+    
+    def _warn_missing_products(self, request, missing_product_ids):
+        if missing_product_ids:
+            self.message_user(
+                request,
+                f'Product(s) not found in Stripe, so nothing was enabled or emailed for: '
+                f'{", ".join(missing_product_ids)}',
+                level=messages.WARNING,
+            )
+    
+    def mark_approved(self, request, queryset):
+        """Approve all types of requests - handles both subscription and demo"""
+        updated_count, subscription_count, demo_count, missing_product_ids = self._approve(queryset)
         
         message_parts = [f'{updated_count} request(s) approved.']
         if subscription_count > 0:
@@ -143,40 +229,29 @@ class SubscriptionRequestAdmin(admin.ModelAdmin):
             message_parts.append(f'{demo_count} demo approval email(s) sent.')
         
         self.message_user(request, ' '.join(message_parts))
+        self._warn_missing_products(request, missing_product_ids)
     mark_approved.short_description = '✅ Approve all requests'
     
     def approve_subscription_requests(self, request, queryset):
         """Approve only subscription requests"""
-        subscription_requests = queryset.filter(request_type='subscription')
-        updated_count = 0
-        
-        for subscription_request in subscription_requests:
-            # Update the request status - signal will handle creating availability
-            subscription_request.status = 'approved'
-            subscription_request.save()
-            updated_count += 1
+        updated_count, _, _, missing_product_ids = self._approve(queryset.filter(request_type='subscription'))
         
         if updated_count == 0:
             self.message_user(request, 'No subscription requests found in selection.', level='warning')
         else:
             self.message_user(request, f'{updated_count} subscription request(s) approved. Users can now subscribe!')
+        self._warn_missing_products(request, missing_product_ids)
     approve_subscription_requests.short_description = '📦 Approve subscription requests'
     
     def approve_demo_requests(self, request, queryset):
         """Approve only demo requests and send notification emails"""
-        demo_requests = queryset.filter(request_type='demo')
-        updated_count = 0
-        
-        for demo_request in demo_requests:
-            # Update the request status - signal will send the email
-            demo_request.status = 'approved'
-            demo_request.save()
-            updated_count += 1
+        updated_count, _, _, missing_product_ids = self._approve(queryset.filter(request_type='demo'))
         
         if updated_count == 0:
             self.message_user(request, 'No demo requests found in selection.', level='warning')
         else:
             self.message_user(request, f'{updated_count} demo request(s) approved. Notification emails sent to users!')
+        self._warn_missing_products(request, missing_product_ids)
     approve_demo_requests.short_description = '🎬 Approve demo requests'
     
     def mark_rejected(self, request, queryset):
@@ -192,6 +267,8 @@ class SubscriptionAvailabilityAdmin(admin.ModelAdmin):
     search_fields = ['stripe_product__name', 'stripe_product__id', 'user__email', 'user__username', 'user__first_name', 'user__last_name']
     readonly_fields = ['created_at', 'updated_at', 'product_info']
     ordering = ['stripe_product__name', 'user__email']
+    # Skip the unfiltered COUNT(*) shown next to filtered results
+    show_full_result_count = False
     
     fieldsets = (
         ('Product Information', {
@@ -209,7 +286,12 @@ class SubscriptionAvailabilityAdmin(admin.ModelAdmin):
     )
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('stripe_product', 'user')
+        # Joined djstripe/user rows are wide (metadata JSON etc.); load just what the pages display
+        return super().get_queryset(request).select_related('stripe_product', 'user').only(
+            'id', 'stripe_product', 'user', 'make_subscription_available', 'created_at', 'updated_at',
+            'stripe_product__id', 'stripe_product__name', 'stripe_product__active',
+            'user__username', 'user__email', 'user__first_name', 'user__last_name',
+        )
     
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "user":
@@ -226,25 +308,23 @@ class SubscriptionAvailabilityAdmin(admin.ModelAdmin):
         """Display user information or 'Global'"""
         if obj.user:
             return f"{obj.user.get_full_name() or obj.user.username} ({obj.user.email})"
-        return format_html('<strong>Global</strong>')
+        return GLOBAL_USER_HTML
     user_display.short_description = 'User'
     user_display.admin_order_field = 'user__email'
     
     def availability_status(self, obj):
         """Display availability status with colored indicators"""
         if obj.make_subscription_available:
-            return format_html('<span style="color: green; font-weight: bold;">✓ Available</span>')
-        else:
-            return format_html('<span style="color: orange; font-weight: bold;">⚠ Request Only</span>')
+            return AVAILABLE_HTML
+        return REQUEST_ONLY_HTML
     availability_status.short_description = 'Status'
     availability_status.admin_order_field = 'make_subscription_available'
     
     def scope(self, obj):
         """Display whether this is user-specific or global"""
-        if obj.user:
-            return format_html('<span style="color: blue;">User-Specific</span>')
-        else:
-            return format_html('<span style="color: purple;">Global</span>')
+        if obj.user_id:
+            return SCOPE_USER_HTML
+        return SCOPE_GLOBAL_HTML
     scope.short_description = 'Scope'
     
     def product_info(self, obj):
@@ -282,20 +362,33 @@ class SubscriptionAvailabilityAdmin(admin.ModelAdmin):
         from django.contrib.auth import get_user_model
         User = get_user_model()
         
+        # Only global records fan out; filtering in SQL avoids loading each row's user.
+        # order_by() drops the changelist ordering, whose joined columns would defeat distinct().
+        product_ids = list(
+            queryset.filter(user__isnull=True).order_by().values_list('stripe_product_id', flat=True).distinct()
+        )
+        
         created_count = 0
-        for availability in queryset:
-            if availability.user:  # Only process user-specific records
-                continue
-                
-            # Create availability records for all users
-            for user in User.objects.all():
-                obj, created = SubscriptionAvailability.objects.get_or_create(
-                    stripe_product=availability.stripe_product,
-                    user=user,
-                    defaults={'make_subscription_available': False}
+        if product_ids:
+            # One INSERT ... SELECT adds every missing (product, user) pair inside the database;
+            # ON CONFLICT on the unique (stripe_product, user) pair keeps it idempotent.
+            opts = SubscriptionAvailability._meta
+            product_col = opts.get_field('stripe_product').column
+            user_col = opts.get_field('user').column
+            now = timezone.now()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {opts.db_table}
+                        ({product_col}, {user_col}, make_subscription_available, created_at, updated_at)
+                    SELECT p.product_id, u.{User._meta.pk.column}, false, %s, %s
+                    FROM unnest(%s) AS p(product_id)
+                    CROSS JOIN {User._meta.db_table} u
+                    ON CONFLICT ({product_col}, {user_col}) DO NOTHING
+                    """,
+                    [now, now, product_ids],
                 )
-                if created:
-                    created_count += 1
+                created_count = cursor.rowcount
         
         self.message_user(request, f'Created {created_count} user-specific availability records.')
     create_for_all_users.short_description = 'Create user-specific records for all users'
@@ -308,6 +401,8 @@ class ProductDemoLinkAdmin(admin.ModelAdmin):
     search_fields = ['product_name', 'stripe_product_id', 'demo_url', 'button_text']
     readonly_fields = ['created_at', 'updated_at', 'preview_link']
     ordering = ['display_order', 'product_name']
+    # Skip the unfiltered COUNT(*) shown next to filtered results
+    show_full_result_count = False
     
     fieldsets = (
         ('Product Information', {
@@ -331,11 +426,10 @@ class ProductDemoLinkAdmin(admin.ModelAdmin):
     def demo_link_display(self, obj):
         """Display the demo URL as a clickable link"""
         if obj.demo_url:
-            target = '_blank' if obj.open_in_new_tab else '_self'
-            return format_html(
-                '<a href="{}" target="{}" style="color: #3b82f6;">🔗 {}</a>',
-                obj.demo_url, target, obj.demo_url[:50] + '...' if len(obj.demo_url) > 50 else obj.demo_url
-            )
+            label = obj.demo_url
+            if len(label) > DEMO_URL_LABEL_LENGTH:
+                label = label[:DEMO_URL_LABEL_LENGTH] + '...'
+            return format_html(DEMO_LINK_TEMPLATE, obj.demo_url, LINK_TARGETS[obj.open_in_new_tab], label)
         return '-'
     demo_link_display.short_description = 'Demo URL'
     
@@ -361,7 +455,7 @@ class ProductDemoLinkAdmin(admin.ModelAdmin):
                 active_badge,
                 target_badge,
                 obj.demo_url,
-                '_blank' if obj.open_in_new_tab else '_self',
+                LINK_TARGETS[obj.open_in_new_tab],
                 obj.button_text
             )
         return 'Preview will appear after saving.'
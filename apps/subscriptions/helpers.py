@@ -1,6 +1,7 @@
 import logging
 
 import stripe
+from django.core.cache import cache
 from django.db import transaction
 from django.urls import reverse
 from django.utils import timezone
@@ -18,6 +19,27 @@ from .exceptions import SubscriptionConfigError
 
 log = logging.getLogger("test.subscription")
 
+STRIPE_PRODUCT_CACHE_TIMEOUT = 300
+PRODUCT_FEATURES_CACHE_TIMEOUT = 3600
+ACTIVE_PRODUCTS_CACHE_KEY = "active_products:v1"
+ACTIVE_PRODUCTS_CACHE_TIMEOUT = 900
+
+
+def stripe_product_cache_key(product_id: str) -> str:
+    return f"stripe_product:{product_id}"
+
+
+def product_features_cache_key(product_id: str) -> str:
+    return f"product_features:{product_id}"
+
+
+def clear_stripe_product_cache(product_id: str):
+    cache.delete_many([stripe_product_cache_key(product_id), product_features_cache_key(product_id)])
+
+
+def clear_active_products_cache():
+    cache.delete(ACTIVE_PRODUCTS_CACHE_KEY)
+
 
 def subscription_is_active(subscription: Subscription) -> bool:
     return subscription.status in [SubscriptionStatus.active, SubscriptionStatus.trialing, SubscriptionStatus.past_due]
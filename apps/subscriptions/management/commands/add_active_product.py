@@ -6,12 +6,20 @@ Usage:
     python manage.py add_active_product prod_ABC123 --env production
 """
 
+import os
 import re
+import shutil
+import tempfile
 from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import slugify
 from djstripe.models import Product
 
+# Compiled once at import
+_RE_ACTIVE_PLAN_INTERVALS = re.compile(r'(ACTIVE_PLAN_INTERVALS = \[.*?\]\n)', re.DOTALL)
+_RE_STRIPE_LIVE_MODE = re.compile(r'(STRIPE_LIVE_MODE = .*?\n)')
+
 
 class Command(BaseCommand):
     help = 'Add a Stripe product to ACTIVE_PRODUCTS in settings.py or settings_production.py'
@@ -79,8 +87,6 @@ class Command(BaseCommand):
 
     def _generate_product_metadata(self, product, is_default):
         """Generate ProductMetadata code for the product"""
-        from django.utils.text import slugify
-        
         slug = slugify(product.name)
         
         # Get features from product metadata or use defaults
@@ -119,52 +125,113 @@ class Command(BaseCommand):
             content = f.read()
         
         # Check if product already exists
-        if product_id in content:
+        replace_existing = product_id in content
+        if replace_existing:
             self.stdout.write(self.style.WARNING(f'\nProduct {product_id} already exists in {settings_file}'))
             response = input('Do you want to update it? (yes/no): ')
             if response.lower() not in ['yes', 'y']:
                 self.stdout.write('Cancelled.')
                 return
-            
-            # Remove existing entry
-            content = self._remove_existing_product(content, product_id)
         
         # Find ACTIVE_PRODUCTS list
         if 'ACTIVE_PRODUCTS = [' in content:
-            # Add to existing list
-            content = self._add_to_active_products(content, product_metadata_code)
+            # Drop any existing entry and add the new one to the list in a single pass
+            content = self._add_to_active_products(
+                content, product_metadata_code, replace_product_id=product_id if replace_existing else None
+            )
         else:
+            if replace_existing:
+                content = self._remove_existing_product(content, product_id)
             # Create new ACTIVE_PRODUCTS list
             if env == 'production':
                 content = self._create_active_products_section_production(content, product_metadata_code)
             else:
                 content = self._create_active_products_section_development(content, product_metadata_code)
         
-        # Write back to file
-        with open(file_path, 'w') as f:
-            f.write(content)
+        # Write to a temp file beside the original and swap it in, so a failed write
+        # never leaves a truncated settings file behind
+        with tempfile.NamedTemporaryFile('w', dir=file_path.parent, delete=False) as f:
+            try:
+                f.write(content)
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        shutil.copymode(file_path, f.name)
+        os.replace(f.name, file_path)
+
+    def _find_product_entries(self, content, product_id):
+        """
+        Yield (start, end) spans of ProductMetadata entries for product_id.
+        
+        A span runs from the start of the entry's line (when only indentation precedes it)
+        through its closing "),\n". Found with a linear scan rather than a DOTALL regex.
+        """
+        stripe_id = f"stripe_id='{product_id}'"
+        search_from = 0
+        while True:
+            start = content.find('ProductMetadata(', search_from)
+            if start == -1:
+                return
+            search_from = start + len('ProductMetadata(')
+            id_start = search_from
+            while id_start < len(content) and content[id_start].isspace():
+                id_start += 1
+            if not content.startswith(stripe_id, id_start):
+                continue
+            end = content.find('),\n', id_start + len(stripe_id))
+            if end == -1:
+                return
+            search_from = end + len('),\n')
+            
+            line_start = content.rfind('\n', 0, start) + 1
+            if content[line_start:start].isspace():
+                start = line_start
+            yield start, search_from
 
     def _remove_existing_product(self, content, product_id):
         """Remove existing product entry from ACTIVE_PRODUCTS"""
-        # Pattern to match ProductMetadata entry
-        pattern = rf"ProductMetadata\(\s*stripe_id='{product_id}'.*?\),\n"
-        content = re.sub(pattern, '', content, flags=re.DOTALL | re.MULTILINE)
-        return content
+        parts = []
+        pos = 0
+        for start, end in self._find_product_entries(content, product_id):
+            parts.append(content[pos:start])
+            pos = end
+        parts.append(content[pos:])
+        return ''.join(parts)
 
-    def _add_to_active_products(self, content, product_metadata_code):
-        """Add product to existing ACTIVE_PRODUCTS list"""
-        # Find the closing bracket of ACTIVE_PRODUCTS
-        pattern = r'(ACTIVE_PRODUCTS = \[.*?)(^\])'
+    def _add_to_active_products(self, content, product_metadata_code, replace_product_id=None):
+        """
+        Add product to existing ACTIVE_PRODUCTS list.
         
-        def replacer(match):
-            existing = match.group(1)
-            closing = match.group(2)
-            
-            # Add new product before closing bracket
-            return f"{existing}\n{product_metadata_code}\n{closing}"
+        When replace_product_id is given, its existing entries are dropped in the same pass,
+        so the content is scanned and joined once.
+        """
+        # The list closes at the first "]" that starts a line after the opening bracket
+        start = content.find('ACTIVE_PRODUCTS = [')
+        if start == -1:
+            return content
+        closing = content.find('\n]', start)
+        if closing == -1:
+            return content
+        closing += 1
         
-        content = re.sub(pattern, replacer, content, flags=re.MULTILINE | re.DOTALL)
-        return content
+        removals = self._find_product_entries(content, replace_product_id) if replace_product_id else ()
+        parts = []
+        pos = 0
+        inserted = False
+        for entry_start, entry_end in removals:
+            if not inserted and entry_start >= closing:
+                parts += [content[pos:closing], f"\n{product_metadata_code}\n"]
+                pos = closing
+                inserted = True
+            parts.append(content[pos:entry_start])
+            pos = entry_end
+        if not inserted:
+            # Add new product before closing bracket
+            parts += [content[pos:closing], f"\n{product_metadata_code}\n"]
+            pos = max(pos, closing)
+        parts.append(content[pos:])
+        return ''.join(parts)
 
     def _create_active_products_section_development(self, content, product_metadata_code):
         """Create ACTIVE_PRODUCTS section in settings.py"""
@@ -173,8 +240,6 @@ class Command(BaseCommand):
         
         if insert_after in content:
             # Find the end of ACTIVE_PLAN_INTERVALS
-            pattern = r'(ACTIVE_PLAN_INTERVALS = \[.*?\]\n)'
-            
             def replacer(match):
                 existing = match.group(1)
                 new_section = f"""ACTIVE_PRODUCTS = [
@@ -184,7 +249,7 @@ class Command(BaseCommand):
 """
                 return f"{existing}{new_section}"
             
-            content = re.sub(pattern, replacer, content, flags=re.DOTALL)
+            content = _RE_ACTIVE_PLAN_INTERVALS.sub(replacer, content)
         
         return content
 
@@ -203,12 +268,10 @@ ACTIVE_PRODUCTS = [
         
         # Find a good place to insert (after STRIPE_LIVE_MODE)
         if 'STRIPE_LIVE_MODE' in content:
-            pattern = r'(STRIPE_LIVE_MODE = .*?\n)'
-            
             def replacer(match):
                 return f"{match.group(1)}{insert_text}"
             
-            content = re.sub(pattern, replacer, content)
+            content = _RE_STRIPE_LIVE_MODE.sub(replacer, content)
         else:
             # Add at the end
             content += insert_text
@@ -6,12 +6,14 @@ in the subscription pages.
 
 Usage:
     python manage.py add_product_features prod_T9Fmx6Ey5TNwLT "Feature 1,Feature 2,Feature 3"
+    python manage.py add_product_features prod_T9Fmx6Ey5TNwLT,prod_T9G51eeTkn3ttj "Feature 1,Feature 2"
     python manage.py add_product_features prod_T9Fmx6Ey5TNwLT --interactive
 """
 
 import stripe
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 from djstripe.models import Product
 
 
@@ -22,7 +24,7 @@ class Command(BaseCommand):
         parser.add_argument(
             'product_id',
             type=str,
-            help='Stripe product ID (e.g., prod_T9Fmx6Ey5TNwLT)'
+            help='Stripe product ID (e.g., prod_T9Fmx6Ey5TNwLT), or a comma-separated list of IDs'
         )
         parser.add_argument(
             'features',
@@ -37,7 +39,7 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        product_id = options['product_id']
+        product_ids = [p.strip() for p in options['product_id'].split(',') if p.strip()]
         features_input = options.get('features')
         interactive = options.get('interactive', False)
         
@@ -50,9 +52,13 @@ class Command(BaseCommand):
             env_name = "TEST (Development)"
         
         try:
-            # Get product from database
-            product = Product.objects.get(id=product_id)
-            self.stdout.write(f'\n📦 Product: {product.name}')
+            # Get products from database in one query
+            products = Product.objects.in_bulk(product_ids, field_name='id')
+            missing_ids = [product_id for product_id in product_ids if product_id not in products]
+            if missing_ids:
+                raise Product.DoesNotExist(', '.join(missing_ids))
+            for product in products.values():
+                self.stdout.write(f'\n📦 Product: {product.name}')
             self.stdout.write(f'Environment: {env_name}')
             
             # Get features
@@ -73,23 +79,31 @@ class Command(BaseCommand):
             for i, feature in enumerate(features, 1):
                 self.stdout.write(f'  {i}. {feature}')
             
-            # Update Stripe product metadata
-            stripe_product = stripe.Product.modify(
-                product_id,
-                metadata={
-                    'features': ','.join(features)
-                }
-            )
-            
-            # Update local database
-            product.metadata = stripe_product.metadata
-            product.save()
+            # Update Stripe product metadata; the stripe client reuses one HTTP session across calls
+            updated = []
+            now = timezone.now()
+            try:
+                for product in products.values():
+                    stripe_product = stripe.Product.modify(
+                        product.id,
+                        metadata={
+                            'features': ','.join(features)
+                        }
+                    )
+                    product.metadata = stripe_product.metadata
+                    product.djstripe_updated = now
+                    updated.append(product)
+            finally:
+                # Save every product Stripe accepted, even if a later one failed, in one statement that only
+                # writes metadata and the sync timestamp (auto_now isn't applied here, so it is set above)
+                Product.objects.bulk_update(updated, ['metadata', 'djstripe_updated'])
+                for product in updated:
+                    self.stdout.write(self.style.SUCCESS(f'\n✅ Successfully updated {product.name}'))
             
-            self.stdout.write(self.style.SUCCESS(f'\n✅ Successfully updated {product.name}'))
             self.stdout.write('Features are now available in subscription pages!')
             
-        except Product.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f'Product {product_id} not found in database'))
+        except Product.DoesNotExist as e:
+            self.stdout.write(self.style.ERROR(f'Product {e} not found in database'))
             self.stdout.write('Run: python manage.py sync_all_stripe_products')
             
         except stripe.error.StripeError as e:
@@ -1,10 +1,12 @@
 """
 Management command to check user template paths and diagnose issues.
 """
+import os
+
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from djstripe.models import Product
-from pathlib import Path
 from django.conf import settings
 
 User = get_user_model()
@@ -35,29 +37,41 @@ class Command(BaseCommand):
         self.stdout.write(f"USER_PROGRAMS_DIR: {user_programs_dir}")
         self.stdout.write(f"Exists: {user_programs_dir.exists()}\n")
         
-        # List all user directories
+        # List all user directories, remembering each one's product directories for the diagnosis below
+        user_dirs = {}
         if user_programs_dir.exists():
             self.stdout.write(self.style.WARNING("Found user directories:"))
-            for user_dir in sorted(user_programs_dir.glob("user_*")):
-                user_num = user_dir.name.replace("user_", "")
-                self.stdout.write(f"  - {user_dir.name}")
+            # Listings are collected and written in one call per section rather than line by line
+            lines = []
+            # os.scandir reuses the directory entry's type, avoiding a stat() per is_dir() check
+            for user_entry in self._scan_dirs(user_programs_dir, prefix="user_"):
+                user_num = user_entry.name.replace("user_", "")
+                lines.append(f"  - {user_entry.name}")
+                product_dir_names = user_dirs[user_entry.name] = []
                 
                 # List products for this user
-                for product_dir in sorted(user_dir.iterdir()):
-                    if product_dir.is_dir():
-                        template_file = product_dir / "template.html"
-                        exists_icon = "✓" if template_file.exists() else "✗"
-                        self.stdout.write(f"    {exists_icon} {product_dir.name}")
-                        if template_file.exists():
-                            self.stdout.write(f"        Template: {template_file}")
+                for product_entry in self._scan_dirs(user_entry.path):
+                    product_dir_names.append(product_entry.name)
+                    template_file = os.path.join(product_entry.path, "template.html")
+                    template_exists = os.path.isfile(template_file)
+                    exists_icon = "✓" if template_exists else "✗"
+                    lines.append(f"    {exists_icon} {product_entry.name}")
+                    if template_exists:
+                        lines.append(f"        Template: {template_file}")
+            if lines:
+                self.stdout.write("\n".join(lines))
         
         # Show all products in database
         self.stdout.write(self.style.WARNING("\nProducts in database:"))
-        products = Product.objects.all()
+        # Stream only the printed columns rather than materializing every full row
+        products = Product.objects.only('id', 'name', 'description').iterator(chunk_size=500)
+        lines = []
         for product in products:
-            self.stdout.write(f"  - ID: {product.id}")
-            self.stdout.write(f"    Name: '{product.name}'")
-            self.stdout.write(f"    Description: {product.description or 'N/A'}")
+            lines.append(f"  - ID: {product.id}")
+            lines.append(f"    Name: '{product.name}'")
+            lines.append(f"    Description: {product.description or 'N/A'}")
+        if lines:
+            self.stdout.write("\n".join(lines))
         
         # Check specific user if provided
         if user_id:
@@ -66,38 +80,44 @@ class Command(BaseCommand):
                 user = User.objects.get(id=user_id)
                 self.stdout.write(f"  User: {user.username} ({user.email})")
                 
-                # Check their subscriptions
-                from djstripe.models import Subscription
-                subscriptions = Subscription.objects.filter(
+                # Check their subscriptions, prefetching each one's items with price and product
+                from djstripe.models import Subscription, SubscriptionItem
+                subscriptions = list(Subscription.objects.filter(
                     customer__subscriber=user,
                     status__in=['active', 'trialing']
-                )
+                ).prefetch_related(
+                    Prefetch('items', queryset=SubscriptionItem.objects.select_related('price__product').order_by('pk'))
+                ))
+                
+                self.stdout.write(f"\n  Active subscriptions: {len(subscriptions)}")
                 
-                self.stdout.write(f"\n  Active subscriptions: {subscriptions.count()}")
+                # Resolved once per user rather than per subscription
+                user_dir_name = f"user_{user.id}"
+                user_root = os.path.join(user_programs_dir, user_dir_name)
                 
                 for subscription in subscriptions:
-                    if subscription.items.exists():
-                        item = subscription.items.first()
+                    items = subscription.items.all()
+                    if items:
+                        item = items[0]
                         product = item.price.product
                         
                         self.stdout.write(f"\n  Product: '{product.name}'")
                         
                         # Check if template exists
-                        template_path = user_programs_dir / f"user_{user.id}" / product.name / "template.html"
+                        template_path = os.path.join(user_root, product.name, "template.html")
                         self.stdout.write(f"  Looking for: {template_path}")
                         
-                        if template_path.exists():
+                        if os.path.isfile(template_path):
                             self.stdout.write(self.style.SUCCESS(f"  ✓ Template EXISTS"))
                         else:
                             self.stdout.write(self.style.ERROR(f"  ✗ Template NOT FOUND"))
                             
                             # Show what directory name they should use
-                            user_product_dir = user_programs_dir / f"user_{user.id}"
-                            if user_product_dir.exists():
-                                self.stdout.write(f"\n  Available directories for user_{user.id}:")
-                                for dir in user_product_dir.iterdir():
-                                    if dir.is_dir():
-                                        self.stdout.write(f"    - {dir.name}")
+                            product_dir_names = user_dirs.get(user_dir_name)
+                            if product_dir_names is not None:
+                                self.stdout.write(f"\n  Available directories for {user_dir_name}:")
+                                for name in product_dir_names:
+                                    self.stdout.write(f"    - {name}")
                                 
                                 self.stdout.write(self.style.WARNING(
                                     f"\n  ACTION NEEDED: Either rename the directory to match product name,"
@@ -111,3 +131,11 @@ class Command(BaseCommand):
         
         self.stdout.write(self.style.SUCCESS('\n=== Check Complete ===\n'))
 
+    @staticmethod
+    def _scan_dirs(path, prefix=""):
+        """Return the subdirectories of path whose names start with prefix, sorted by name."""
+        with os.scandir(path) as entries:
+            return sorted(
+                (entry for entry in entries if entry.name.startswith(prefix) and entry.is_dir()),
+                key=lambda entry: entry.name,
+            )
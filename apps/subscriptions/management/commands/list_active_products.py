@@ -8,7 +8,6 @@ Usage:
 """
 
 from django.core.management.base import BaseCommand
-from apps.subscriptions.metadata import ACTIVE_PRODUCTS
 
 
 class Command(BaseCommand):
@@ -26,6 +25,10 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         from django.conf import settings
         
+        # Same value apps.subscriptions.metadata exposes, read without importing that module's
+        # djstripe, DRF and serializer dependencies
+        ACTIVE_PRODUCTS = getattr(settings, 'ACTIVE_PRODUCTS', [])
+        
         env = options.get('env')
         if env:
             env_name = 'development' if env in ['dev', 'development'] else 'production'
@@ -48,25 +51,30 @@ class Command(BaseCommand):
             self.stdout.write('  python manage.py add_active_product <product_id> --env development')
             return
         
+        # Build the listing in memory and write it in one call rather than line by line
+        lines = []
+        defaults = []
         for idx, product in enumerate(ACTIVE_PRODUCTS, 1):
-            self.stdout.write(f'\n{idx}. {self.style.SUCCESS(product.name)}')
-            self.stdout.write(f'   Stripe ID: {product.stripe_id}')
-            self.stdout.write(f'   Slug: {product.slug}')
-            self.stdout.write(f'   Description: {product.description}')
-            self.stdout.write(f'   Default: {"Yes" if product.is_default else "No"}')
-            self.stdout.write(f'   Features: {len(product.features)} listed')
+            lines.append(f'\n{idx}. {self.style.SUCCESS(product.name)}')
+            lines.append(f'   Stripe ID: {product.stripe_id}')
+            lines.append(f'   Slug: {product.slug}')
+            lines.append(f'   Description: {product.description}')
+            lines.append(f'   Default: {"Yes" if product.is_default else "No"}')
+            if product.is_default:
+                defaults.append(product)
+            lines.append(f'   Features: {len(product.features)} listed')
             
             if product.features:
                 for feature in product.features[:3]:  # Show first 3 features
-                    self.stdout.write(f'     • {feature}')
+                    lines.append(f'     • {feature}')
                 if len(product.features) > 3:
-                    self.stdout.write(f'     ... and {len(product.features) - 3} more')
+                    lines.append(f'     ... and {len(product.features) - 3} more')
+        self.stdout.write('\n'.join(lines))
         
         self.stdout.write('\n' + '='*80)
         self.stdout.write(f'\nTotal: {len(ACTIVE_PRODUCTS)} products')
         
-        # Count defaults
-        defaults = [p for p in ACTIVE_PRODUCTS if p.is_default]
+        # Defaults were collected during the listing pass
         if len(defaults) == 0:
             self.stdout.write(self.style.WARNING('⚠️  Warning: No default product set!'))
         elif len(defaults) > 1:
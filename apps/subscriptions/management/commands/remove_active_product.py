@@ -46,13 +46,11 @@ class Command(BaseCommand):
         if not file_path.exists():
             raise CommandError(f'Settings file not found: {settings_file}')
         
-        # Read the file
-        with open(file_path, 'r') as f:
-            content = f.read()
-        
-        # Check if product exists
-        if product_id not in content:
+        # Check if product exists before decoding the file
+        raw = file_path.read_bytes()
+        if product_id.encode() not in raw:
             raise CommandError(f'Product {product_id} not found in {settings_file}')
+        content = raw.decode()
         
         self.stdout.write(f'\nRemoving product {product_id} from {settings_file}...')
         
@@ -64,8 +62,7 @@ class Command(BaseCommand):
             raise CommandError(f'Failed to remove product {product_id}')
         
         # Write back to file
-        with open(file_path, 'w') as f:
-            f.write(content)
+        file_path.write_text(content)
         
         self.stdout.write(self.style.SUCCESS(f'\n✅ Successfully removed {product_id} from {settings_file}'))
         self.stdout.write(self.style.SUCCESS(f'   Environment: {env}'))
@@ -73,8 +70,6 @@ class Command(BaseCommand):
     def _remove_product(self, content, product_id):
         """Remove product entry from ACTIVE_PRODUCTS"""
         # Pattern to match entire ProductMetadata entry including trailing comma
-        # This handles multi-line entries
-        pattern = rf"    ProductMetadata\(\s*stripe_id='{product_id}'.*?\),\n"
-        content = re.sub(pattern, '', content, flags=re.DOTALL | re.MULTILINE)
-        
-        return content
+        # This handles multi-line entries; the id is escaped so it only ever matches literally
+        pattern = re.compile(rf"    ProductMetadata\(\s*stripe_id='{re.escape(product_id)}'.*?\),\n", re.DOTALL)
+        return pattern.sub('', content)
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from djstripe.models import Product
 from apps.subscriptions.models import SubscriptionAvailability
 
@@ -58,8 +59,7 @@ class Command(BaseCommand):
                 return
 
             self.stdout.write(f'Setting up global availability for {products.count()} products...')
-            for product in products:
-                self.setup_product(product, make_available, None)
+            self.setup_all_products(products, make_available)
 
         self.stdout.write(self.style.SUCCESS('Setup complete!'))
 
@@ -83,22 +83,54 @@ class Command(BaseCommand):
                 self.style.WARNING(f'⏭️  Already exists: {product.name} - {"Available" if availability.make_subscription_available else "Request Only"}{user_info}')
             )
 
+    def setup_all_products(self, products, make_available):
+        """Set up global availability records for all products in one transaction"""
+        with transaction.atomic():
+            # One query for the existing global records instead of a get_or_create per product
+            existing = dict(
+                SubscriptionAvailability.objects.filter(user__isnull=True).values_list(
+                    'stripe_product_id', 'make_subscription_available'
+                )
+            )
+            status = "Available" if make_available else "Request Only"
+            missing = []
+            for product in products.only('djstripe_id', 'name'):
+                if product.pk in existing:
+                    existing_status = "Available" if existing[product.pk] else "Request Only"
+                    self.stdout.write(
+                        self.style.WARNING(f'⏭️  Already exists: {product.name} - {existing_status} (Global)')
+                    )
+                else:
+                    missing.append(SubscriptionAvailability(
+                        stripe_product=product,
+                        user=None,
+                        make_subscription_available=make_available
+                    ))
+                    self.stdout.write(self.style.SUCCESS(f'✅ Created: {product.name} - {status} (Global)'))
+            SubscriptionAvailability.objects.bulk_create(missing, batch_size=500)
+
     def list_availability(self):
         """List all current availability settings"""
-        availabilities = SubscriptionAvailability.objects.select_related('stripe_product').all()
+        # Plain tuples with the user joined in, rather than model instances that fetch each user separately
+        rows = SubscriptionAvailability.objects.values_list(
+            'stripe_product__name', 'stripe_product__id', 'make_subscription_available', 'user__email', 'updated_at'
+        ).iterator(chunk_size=500)
         
-        if not availabilities.exists():
+        lines = []
+        for product_name, product_id, available, user_email, updated_at in rows:
+            status = "✅ Available" if available else "⏳ Request Only"
+            user_info = f" (User: {user_email})" if user_email is not None else " (Global)"
+            lines.append(
+                f'{product_name}{user_info}\n'
+                f'  ID: {product_id}\n'
+                f'  Status: {status}\n'
+                f'  Updated: {updated_at:%Y-%m-%d %H:%M}\n'
+            )
+        
+        if not lines:
             self.stdout.write(self.style.WARNING('No subscription availability records found'))
             return
 
         self.stdout.write(self.style.SUCCESS('Current Subscription Availability Settings:'))
         self.stdout.write('=' * 60)
-        
-        for avail in availabilities:
-            status = "✅ Available" if avail.make_subscription_available else "⏳ Request Only"
-            user_info = f" (User: {avail.user.email})" if avail.user else " (Global)"
-            self.stdout.write(f'{avail.stripe_product.name}{user_info}')
-            self.stdout.write(f'  ID: {avail.stripe_product.id}')
-            self.stdout.write(f'  Status: {status}')
-            self.stdout.write(f'  Updated: {avail.updated_at.strftime("%Y-%m-%d %H:%M")}')
-            self.stdout.write('')
+        self.stdout.write('\n'.join(lines) + '\n')
@@ -14,6 +14,7 @@ Usage:
 import stripe
 import os
 import re
+from itertools import islice
 from django.conf import settings
 from django.core.management.base import BaseCommand
 from djstripe.models import Product
@@ -45,46 +46,48 @@ class Command(BaseCommand):
         self.stdout.write(f'\n🔄 Syncing products from Stripe {env_name} mode...\n')
         
         try:
-            # Fetch all products from Stripe
-            stripe_products = stripe.Product.list(limit=limit)
-            total_in_stripe = len(stripe_products.data)
+            # Stream products from Stripe a page at a time (Stripe caps pages at 100), stopping at --limit
+            stripe_products = stripe.Product.list(limit=min(limit, 100)).auto_paging_iter()
             
-            self.stdout.write(f'📦 Found {total_in_stripe} products in Stripe\n')
+            self.stdout.write(f'📦 Fetching up to {limit} products from Stripe\n')
             self.stdout.write('='*80 + '\n')
             
             created_count = 0
             updated_count = 0
             error_count = 0
             
-            for idx, stripe_prod in enumerate(stripe_products.data, 1):
+            # One query for the ids already synced instead of an exists() per product
+            existing_ids = set(Product.objects.values_list('id', flat=True))
+            write = self.stdout.write
+            success, warn, err = self.style.SUCCESS, self.style.WARNING, self.style.ERROR
+            
+            for idx, stripe_prod in enumerate(islice(stripe_products, limit), 1):
                 try:
                     # Check if product exists
-                    existing = Product.objects.filter(id=stripe_prod.id).exists()
+                    existing = stripe_prod.id in existing_ids
                     
                     # Sync product to database
                     product = Product.sync_from_stripe_data(stripe_prod)
                     
                     if existing:
-                        self.stdout.write(f'{idx:2d}. ⏭️  Updated: {product.name}')
-                        self.stdout.write(f'    ID: {product.id}')
+                        write(f'{idx:2d}. ⏭️  Updated: {product.name}\n    ID: {product.id}')
                         updated_count += 1
                     else:
-                        self.stdout.write(self.style.SUCCESS(f'{idx:2d}. ✅ Created: {product.name}'))
-                        self.stdout.write(self.style.SUCCESS(f'    ID: {product.id}'))
+                        write(success(f'{idx:2d}. ✅ Created: {product.name}\n    ID: {product.id}'))
                         created_count += 1
                     
                     # Show active status
                     if not product.active:
-                        self.stdout.write(self.style.WARNING(f'    ⚠️  Product is inactive in Stripe'))
+                        write(warn(f'    ⚠️  Product is inactive in Stripe'))
                     
                 except Exception as e:
-                    self.stdout.write(self.style.ERROR(f'{idx:2d}. ❌ Error: {stripe_prod.id}'))
-                    self.stdout.write(self.style.ERROR(f'    Error: {str(e)}'))
+                    write(err(f'{idx:2d}. ❌ Error: {stripe_prod.id}\n    Error: {str(e)}'))
                     error_count += 1
             
             self.stdout.write('\n' + '='*80)
             self.stdout.write(self.style.SUCCESS(f'\n✅ Sync Complete!'))
             self.stdout.write(f'\n📊 Results:')
+            self.stdout.write(f'   • Products fetched from Stripe: {created_count + updated_count + error_count}')
             self.stdout.write(f'   • New products created: {created_count}')
             self.stdout.write(f'   • Existing products updated: {updated_count}')
             if error_count > 0:
@@ -95,13 +98,17 @@ class Command(BaseCommand):
             
             # Show products without prices
             products_without_prices = Product.objects.filter(prices__isnull=True)
-            if products_without_prices.exists():
-                self.stdout.write(self.style.WARNING(f'\n⚠️  {products_without_prices.count()} products have no prices:'))
-                for p in products_without_prices[:5]:
-                    self.stdout.write(f'   • {p.name} ({p.id})')
-                if products_without_prices.count() > 5:
-                    self.stdout.write(f'   ... and {products_without_prices.count() - 5} more')
-                self.stdout.write('\n   💡 Tip: Add prices in Stripe dashboard, then sync again')
+            # Fetch one past the five shown; only a full sample needs a separate count
+            sample = list(products_without_prices.only('id', 'name')[:6])
+            without_prices_count = products_without_prices.count() if len(sample) > 5 else len(sample)
+            if without_prices_count:
+                lines = [self.style.WARNING(f'\n⚠️  {without_prices_count} products have no prices:')]
+                for p in sample[:5]:
+                    lines.append(f'   • {p.name} ({p.id})')
+                if without_prices_count > 5:
+                    lines.append(f'   ... and {without_prices_count - 5} more')
+                lines.append('\n   💡 Tip: Add prices in Stripe dashboard, then sync again')
+                self.stdout.write('\n'.join(lines))
             
             self.stdout.write('\n')
             
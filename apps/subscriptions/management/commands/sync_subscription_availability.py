@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from djstripe.models import Product
 from apps.subscriptions.models import SubscriptionAvailability
 
@@ -49,20 +50,28 @@ class Command(BaseCommand):
         if dry_run:
             self.stdout.write(self.style.WARNING('DRY RUN MODE - No changes will be made'))
 
+        # Flag products that already have a global record in the same query that loads them
+        products = Product.objects.annotate(
+            has_global=Exists(SubscriptionAvailability.objects.filter(
+                stripe_product=OuterRef('pk'),
+                user__isnull=True
+            ))
+        )
+
         if product_id:
             try:
-                product = Product.objects.get(id=product_id)
+                product = products.get(id=product_id)
                 self.sync_product(product, create_for_users, make_available, dry_run)
             except Product.DoesNotExist:
                 raise CommandError(f'Product with ID {product_id} not found')
         else:
             # Sync all products
-            products = Product.objects.filter(active=True)
-            if not products.exists():
+            products = list(products.filter(active=True))
+            if not products:
                 self.stdout.write(self.style.WARNING('No active products found in database'))
                 return
 
-            self.stdout.write(f'Syncing availability for {products.count()} active products...')
+            self.stdout.write(f'Syncing availability for {len(products)} active products...')
             for product in products:
                 self.sync_product(product, create_for_users, make_available, dry_run)
 
@@ -95,14 +104,7 @@ class Command(BaseCommand):
     def create_global_availability(self, product, make_available, dry_run=False):
         """Create or update global availability record"""
         if dry_run:
-            exists = SubscriptionAvailability.objects.filter(
-                stripe_product=product,
-                user__isnull=True
-            ).exists()
-            if exists:
-                return False
-            else:
-                return True
+            return not product.has_global
 
         availability, created = SubscriptionAvailability.objects.get_or_create(
             stripe_product=product,
@@ -113,27 +115,29 @@ class Command(BaseCommand):
 
     def create_user_specific_records(self, product, make_available, dry_run=False):
         """Create user-specific availability records for all users"""
-        users = User.objects.all()
-        created_count = 0
-
-        for user in users:
-            if dry_run:
-                exists = SubscriptionAvailability.objects.filter(
-                    stripe_product=product,
-                    user=user
-                ).exists()
-                if not exists:
-                    created_count += 1
-            else:
-                availability, created = SubscriptionAvailability.objects.get_or_create(
-                    stripe_product=product,
-                    user=user,
-                    defaults={'make_subscription_available': make_available}
-                )
-                if created:
-                    created_count += 1
-
-        return created_count
+        has_record = SubscriptionAvailability.objects.filter(
+            stripe_product=product,
+            user__isnull=False
+        )
+        if dry_run:
+            # Counting in the database avoids loading any users
+            return User.objects.exclude(id__in=has_record.values('user_id')).count()
+
+        # One query for the users that already have a record, then one batched insert for the rest
+        existing_user_ids = set(has_record.values_list('user_id', flat=True))
+        missing = [
+            SubscriptionAvailability(
+                stripe_product=product,
+                user_id=user_id,
+                make_subscription_available=make_available
+            )
+            for user_id in User.objects.values_list('id', flat=True).iterator()
+            if user_id not in existing_user_ids
+        ]
+
+        # ignore_conflicts covers records created concurrently since the read above
+        SubscriptionAvailability.objects.bulk_create(missing, batch_size=1000, ignore_conflicts=True)
+        return len(missing)
 
     def list_availability(self):
         """List all current availability records"""
@@ -10,11 +10,14 @@ Usage:
 """
 
 import os
-import re
+import shutil
+import tempfile
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from djstripe.models import Product
 
+from apps.utils.billing import get_stripe_module
+
 
 class Command(BaseCommand):
     help = 'Add or remove products from ACTIVE_PRODUCTS list in metadata.py'
@@ -65,8 +68,7 @@ class Command(BaseCommand):
         except (Product.DoesNotExist, Exception):
             # Try to get product info from Stripe API
             try:
-                import stripe
-                stripe.api_key = settings.STRIPE_TEST_SECRET_KEY if not settings.STRIPE_LIVE_MODE else settings.STRIPE_LIVE_SECRET_KEY
+                stripe = get_stripe_module()
                 stripe_product = stripe.Product.retrieve(product_id)
                 product_name = stripe_product.name
                 self.stdout.write(f'ℹ️  Product {product_name} not in database, using Stripe API data')
@@ -85,38 +87,65 @@ class Command(BaseCommand):
         else:
             self._add_product_to_list(product_id, product_name, target_file)
 
+    def _find_active_products_block(self, lines):
+        """
+        Return the (start, end) line indexes of the ACTIVE_PRODUCTS list, or None if it isn't defined.
+        
+        The list is located with a line scan and a bracket counter over the code part of each line.
+        """
+        start = next((i for i, line in enumerate(lines) if line.lstrip().startswith('ACTIVE_PRODUCTS = [')), None)
+        if start is None:
+            return None
+        
+        depth = 0
+        for end in range(start, len(lines)):
+            code = lines[end].split('#', 1)[0]
+            depth += code.count('[') - code.count(']')
+            if depth <= 0:
+                return start, end
+        return None
+
     def _add_product_to_list(self, product_id, product_name, target_file):
         """Add product ID to ACTIVE_PRODUCTS list"""
         self.stdout.write(f'📝 Adding {product_name} to {target_file}...')
         
         # Read current file
         with open(target_file, 'r') as f:
-            content = f.read()
+            lines = f.readlines()
         
         # Check if product ID already exists (not in comments)
-        lines = content.split('\n')
         for line in lines:
             if f"'{product_id}'" in line and not line.strip().startswith('#'):
                 self.stdout.write(f'ℹ️  Product {product_name} is already in ACTIVE_PRODUCTS')
                 return
         
-        # Add product ID to the list
-        pattern = r'(ACTIVE_PRODUCTS = \[)(.*?)(\])'
-        
-        def replacer(match):
-            start = match.group(1)
-            existing = match.group(2)
-            end = match.group(3)
-            
-            # Add new product ID with comment
-            new_entry = f"\n    '{product_id}',  # {product_name}"
-            return f"{start}{existing}{new_entry}\n{end}"
-        
-        new_content = re.sub(pattern, replacer, content, flags=re.DOTALL)
+        block = self._find_active_products_block(lines)
+        if block is None:
+            self.stdout.write(self.style.ERROR(f'ACTIVE_PRODUCTS list not found in {target_file}'))
+            return
+        start, end = block
+        
+        # Add new product ID with comment
+        new_entry = f"    '{product_id}',  # {product_name}\n"
+        if start == end:
+            # Single-line list, e.g. "ACTIVE_PRODUCTS = []": expand it to one entry per line
+            head, tail = lines[start].split('[', 1)
+            existing, after = tail.split(']', 1)
+            replacement = [f'{head}[\n']
+            replacement += [f'    {entry.strip()},\n' for entry in existing.split(',') if entry.strip()]
+            replacement += [new_entry, f']{after}']
+            lines[start:end + 1] = replacement
+        else:
+            # The previous last entry needs a trailing comma, or the strings would be concatenated
+            for idx in range(end - 1, start, -1):
+                code = lines[idx].split('#', 1)[0].rstrip()
+                if code:
+                    if not code.endswith(','):
+                        lines[idx] = f'{code},{lines[idx][len(code):]}'
+                    break
+            lines.insert(end, new_entry)
         
-        # Write back to file
-        with open(target_file, 'w') as f:
-            f.write(new_content)
+        self._write_lines(target_file, lines)
         
         self.stdout.write(self.style.SUCCESS(f'✅ Added {product_name} to ACTIVE_PRODUCTS'))
 
@@ -126,52 +155,84 @@ class Command(BaseCommand):
         
         # Read current file
         with open(target_file, 'r') as f:
-            content = f.read()
+            lines = f.readlines()
+        
+        block = self._find_active_products_block(lines)
+        quoted_id = f"'{product_id}'"
+        removed = False
+        if block is not None:
+            start, end = block
+            if start == end:
+                # Single-line list, e.g. "ACTIVE_PRODUCTS = ['prod_a', 'prod_b']": drop the entry in place
+                head, tail = lines[start].split('[', 1)
+                existing, after = tail.split(']', 1)
+                entries = [entry.strip() for entry in existing.split(',') if entry.strip()]
+                remaining = [entry for entry in entries if entry != quoted_id]
+                if len(remaining) != len(entries):
+                    removed = True
+                    lines[start] = f"{head}[{', '.join(remaining)}]{after}"
+            else:
+                # Remove the list lines whose code (not comment) holds the product ID
+                body = [line for line in lines[start + 1:end] if quoted_id not in line.split('#', 1)[0]]
+                if len(body) != end - start - 1:
+                    removed = True
+                    lines[start + 1:end] = body
         
         # Check if product ID exists
-        if f"'{product_id}'" not in content:
+        if not removed:
             self.stdout.write(f'ℹ️  Product {product_name} is not in ACTIVE_PRODUCTS')
             return
         
-        # Remove product ID and its comment line
-        pattern = rf"\s*'{product_id}',\s*# {re.escape(product_name)}\s*\n?"
-        new_content = re.sub(pattern, '', content)
-        
-        # Write back to file
-        with open(target_file, 'w') as f:
-            f.write(new_content)
+        self._write_lines(target_file, lines)
         
         self.stdout.write(self.style.WARNING(f'❌ Removed {product_name} from ACTIVE_PRODUCTS'))
 
+    def _write_lines(self, target_file, lines):
+        """Write lines to a temp file beside target_file and swap it in, so a failed write never truncates it"""
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(os.path.abspath(target_file)), delete=False) as f:
+            try:
+                f.writelines(lines)
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        shutil.copymode(target_file, f.name)
+        os.replace(f.name, target_file)
+
     def _list_available_products(self):
         """List all products in ACTIVE_PRODUCTS"""
-        from apps.subscriptions.metadata import ACTIVE_PRODUCTS
+        from apps.subscriptions.metadata import ACTIVE_PRODUCT_IDS, ACTIVE_PRODUCTS
         
         self.stdout.write('\n📦 Products in ACTIVE_PRODUCTS\n')
         self.stdout.write('='*60)
         
         if ACTIVE_PRODUCTS:
+            # One query for every listed product instead of a get() per id
+            try:
+                active_products = Product.objects.filter(id__in=ACTIVE_PRODUCTS).in_bulk(field_name='id')
+            except Exception:
+                active_products = {}
             for idx, product_id in enumerate(ACTIVE_PRODUCTS, 1):
-                try:
-                    product = Product.objects.get(id=product_id)
+                product = active_products.get(product_id)
+                if product is not None:
                     self.stdout.write(f'{idx:2d}. {product.name}')
                     self.stdout.write(f'    ID: {product.id}')
                     if product.description:
                         self.stdout.write(f'    Description: {product.description[:80]}...')
                     self.stdout.write()
-                except (Product.DoesNotExist, Exception):
+                else:
                     self.stdout.write(self.style.ERROR(f'{idx:2d}. ❌ Product {product_id} not found in database'))
         else:
             self.stdout.write(self.style.WARNING('No products in ACTIVE_PRODUCTS'))
         
         # Show all available products
         try:
-            all_products = Product.objects.all().order_by('name')
-            self.stdout.write(f'\n📋 All Products in Database ({all_products.count()} total)\n')
+            all_products = list(Product.objects.only('id', 'name').order_by('name'))
+            self.stdout.write(f'\n📋 All Products in Database ({len(all_products)} total)\n')
             self.stdout.write('='*60)
             
             for idx, product in enumerate(all_products, 1):
-                status = '✅' if product.id in ACTIVE_PRODUCTS else '⭕'
+                status = '✅' if product.id in ACTIVE_PRODUCT_IDS else '⭕'
                 self.stdout.write(f'{idx:2d}. {status} {product.name} ({product.id})')
             
             self.stdout.write(f'\n✅ = In ACTIVE_PRODUCTS, ⭕ = Available to add')
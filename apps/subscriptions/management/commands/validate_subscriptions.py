@@ -10,6 +10,7 @@ Usage:
 
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db.models import Count, Q
 from djstripe.models import Product
 
 
@@ -40,22 +41,26 @@ class Command(BaseCommand):
         missing_products = []
         valid_products = []
         
+        # One query for every configured product, with its active price count annotated
+        products = Product.objects.filter(id__in=active_products).annotate(
+            active_price_count=Count('prices', filter=Q(prices__active=True))
+        ).in_bulk(field_name='id')
+        
         for product_id in active_products:
-            try:
-                product = Product.objects.get(id=product_id)
-                valid_products.append(product)
-                self.stdout.write(f'✅ {product.name} ({product_id})')
-                
-                # Check if product has active prices
-                active_prices = product.prices.filter(active=True)
-                if active_prices.exists():
-                    self.stdout.write(f'   └─ {active_prices.count()} active price(s) found')
-                else:
-                    self.stdout.write(self.style.WARNING(f'   └─ ⚠️  No active prices found'))
-                    
-            except Product.DoesNotExist:
+            product = products.get(product_id)
+            if product is None:
                 missing_products.append(product_id)
                 self.stdout.write(self.style.ERROR(f'❌ Product {product_id} not found in database'))
+                continue
+            
+            valid_products.append(product)
+            self.stdout.write(f'✅ {product.name} ({product_id})')
+            
+            # Check if product has active prices
+            if product.active_price_count:
+                self.stdout.write(f'   └─ {product.active_price_count} active price(s) found')
+            else:
+                self.stdout.write(self.style.WARNING(f'   └─ ⚠️  No active prices found'))
         
         self.stdout.write('\n' + '=' * 60)
         self.stdout.write(f'Valid products: {len(valid_products)}/{len(active_products)}')
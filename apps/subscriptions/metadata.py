@@ -3,9 +3,12 @@ from __future__ import annotations
 import json
 from collections.abc import Generator
 from dataclasses import asdict, dataclass, field
+from functools import cached_property
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
 from django.utils.text import slugify
 from djstripe.enums import PlanInterval
 from djstripe.models import Price, Product
@@ -34,47 +37,35 @@ class ProductMetadata:
 
     @classmethod
     def from_stripe_product(cls, stripe_product: Product, **kwargs) -> ProductMetadata:
-        # Extract features from Stripe marketing_features field
-        features = []
-        
-        # First try to get from marketing_features field (Stripe's built-in field)
-        # Since djstripe Product model doesn't store marketing_features, fetch from API
-        if hasattr(stripe_product, 'marketing_features') and stripe_product.marketing_features:
-            features = [feature.name for feature in stripe_product.marketing_features if hasattr(feature, 'name')]
+        # Extract features from Stripe's marketing_features field. djstripe's Product model doesn't
+        # store it, so it normally comes from the (cached) Stripe API lookup.
+        marketing_features = getattr(stripe_product, 'marketing_features', None)
+        if marketing_features:
+            features = [feature.name for feature in marketing_features if hasattr(feature, 'name')]
         else:
-            # Fetch marketing_features directly from Stripe API
             try:
-                from apps.subscriptions.helpers import get_stripe_module
-                stripe = get_stripe_module()
-                stripe_api_product = stripe.Product.retrieve(stripe_product.id)
-                if hasattr(stripe_api_product, 'marketing_features') and stripe_api_product.marketing_features:
-                    features = [feature['name'] for feature in stripe_api_product.marketing_features]
+                features = _get_marketing_features(stripe_product.id)
             except Exception:
-                # If API fetch fails, continue to fallback methods
-                pass
+                # If API fetch fails, continue to the metadata fallback
+                features = []
         
-        # Fallback to metadata fields if still no features
-        if not features and stripe_product.metadata and 'features' in stripe_product.metadata:
-            # Features stored as JSON string in Stripe metadata
-            try:
-                features = json.loads(stripe_product.metadata['features'])
-            except (json.JSONDecodeError, TypeError):
-                # Fallback: treat as comma-separated string
-                features = stripe_product.metadata['features'].split(',')
-        elif not features and stripe_product.metadata and 'marketing_features' in stripe_product.metadata:
-            # Alternative field name in metadata
-            try:
-                features = json.loads(stripe_product.metadata['marketing_features'])
-            except (json.JSONDecodeError, TypeError):
-                features = stripe_product.metadata['marketing_features'].split(',')
+        # Fallback to features stored in Stripe metadata. A present 'features' key wins even when
+        # empty; 'marketing_features' is the alternative field name.
+        if not features:
+            metadata = stripe_product.metadata or {}
+            if 'features' in metadata:
+                features = _parse_metadata_features(metadata['features'])
+            elif 'marketing_features' in metadata:
+                features = _parse_metadata_features(metadata['marketing_features'])
         
         # Clean up features (remove extra whitespace)
         features = [f.strip() for f in features if f.strip()]
         
-        # Get price displays for different intervals
+        # Get price displays for different intervals.
+        # Filtered in Python so prices prefetched by get_active_products_with_metadata are reused.
         price_displays = {}
-        for price in stripe_product.prices.filter(active=True):
-            if price.recurring and price.recurring.get('interval'):
+        for price in stripe_product.prices.all():
+            if price.active and price.recurring and price.recurring.get('interval'):
                 interval = price.recurring['interval']
                 price_displays[interval] = get_friendly_currency_amount(price)
         
@@ -109,6 +100,39 @@ class ProductMetadata:
         )
 
 
+def _parse_metadata_features(raw_features) -> list[str]:
+    """Features stored in Stripe metadata, either as a JSON list or a comma-separated string."""
+    try:
+        return json.loads(raw_features)
+    except (json.JSONDecodeError, TypeError):
+        return raw_features.split(',')
+
+
+def _get_marketing_features(product_id: str) -> list[str]:
+    """
+    Marketing feature names for a product, retrieved from the Stripe API.
+
+    Cached because every pricing page render would otherwise make one API call per product.
+    The product.updated webhook clears the entry; failed calls are not cached.
+    """
+    from apps.subscriptions.helpers import (
+        PRODUCT_FEATURES_CACHE_TIMEOUT,
+        get_stripe_module,
+        product_features_cache_key,
+    )
+
+    cache_key = product_features_cache_key(product_id)
+    features = cache.get(cache_key)
+    if features is None:
+        stripe = get_stripe_module()
+        stripe_api_product = stripe.Product.retrieve(product_id)
+        features = []
+        if hasattr(stripe_api_product, 'marketing_features') and stripe_api_product.marketing_features:
+            features = [feature['name'] for feature in stripe_api_product.marketing_features]
+        cache.set(cache_key, features, PRODUCT_FEATURES_CACHE_TIMEOUT)
+    return features
+
+
 @dataclass
 class ProductWithMetadata:
     """
@@ -122,16 +146,32 @@ class ProductWithMetadata:
     def stripe_id(self) -> str:
         return self.metadata.stripe_id or self.product.id
 
+    @cached_property
+    def _prices_by_interval(self) -> dict[str, list[Price]]:
+        """
+        Active single-count recurring prices in the current Stripe mode, grouped by interval.
+
+        Built in one pass over prices.all(), so a prefetch serves every interval without a query.
+        """
+        prices_by_interval = {}
+        for price in self.product.prices.all():
+            if (
+                price.active
+                and price.livemode == settings.STRIPE_LIVE_MODE
+                and price.recurring
+                and price.recurring.get("interval_count") == 1
+            ):
+                prices_by_interval.setdefault(price.recurring.get("interval"), []).append(price)
+        return prices_by_interval
+
     def _get_price(self, interval: str, fail_hard: bool = True) -> Price | None:
         if self.product:
-            try:
-                return self.product.prices.get(
-                    recurring__interval=interval,
-                    recurring__interval_count=1,
-                    active=True,
-                    livemode=settings.STRIPE_LIVE_MODE,
-                )
-            except (Price.DoesNotExist, Price.MultipleObjectsReturned):
+            from django.utils.translation import gettext_lazy as _
+
+            matches = self._prices_by_interval.get(interval, [])
+            if len(matches) == 1:
+                return matches[0]
+            else:
                 if fail_hard:
                     raise SubscriptionConfigError(
                         _(
@@ -140,7 +180,7 @@ class ProductWithMetadata:
                             "You can also hide this plan interval by removing it from ACTIVE_PLAN_INTERVALS in "
                             "apps/subscriptions/metadata.py"
                         )
-                    ) from None
+                    )
                 else:
                     return None
 
@@ -248,8 +288,8 @@ ACTIVE_PLAN_INTERVALS = [
 # No hardcoded values here - everything comes from Django settings
 ACTIVE_PRODUCTS = getattr(settings, 'ACTIVE_PRODUCTS', [])
 
-# Convert list of product IDs to set for faster lookup
-ACTIVE_PRODUCT_IDS = set(ACTIVE_PRODUCTS)
+# Convert list of product IDs to an immutable set for faster lookup
+ACTIVE_PRODUCT_IDS = frozenset(ACTIVE_PRODUCTS)
 
 
 def get_active_products_with_metadata() -> Generator[ProductWithMetadata]:
@@ -269,28 +309,42 @@ def get_active_products_with_metadata() -> Generator[ProductWithMetadata]:
     # Only show products explicitly listed in ACTIVE_PRODUCTS
     # If the list is empty, show nothing (not all products in DB)
     if ACTIVE_PRODUCTS:
+        # Load all listed products and their active prices in two queries rather than per product
+        products = Product.objects.filter(id__in=ACTIVE_PRODUCTS).prefetch_related(
+            Prefetch('prices', queryset=Price.objects.filter(active=True))
+        ).in_bulk(field_name='id')
         for product_id in ACTIVE_PRODUCTS:
-            try:
-                product = Product.objects.get(id=product_id)
-                yield ProductWithMetadata(
-                    product=product,
-                    metadata=ProductMetadata.from_stripe_product(product),
-                )
-            except Product.DoesNotExist:
+            product = products.get(product_id)
+            if product is None:
                 raise SubscriptionConfigError(
                     _(
                         f'No Product with ID "{product_id}" found in database! '
                         f'This product ID is in the ACTIVE_PRODUCTS list. '
                         f'Run: python manage.py djstripe_sync_models product price'
                     )
-                ) from None
+                )
+            yield ProductWithMetadata(
+                product=product,
+                metadata=ProductMetadata.from_stripe_product(product),
+            )
     # If ACTIVE_PRODUCTS is empty, return nothing (generator will be empty)
 
 
+def get_active_products_serialized() -> list[dict]:
+    """
+    The active products serialized with ProductWithMetadata.to_dict, as served by the products API.
+
+    Cached for ACTIVE_PRODUCTS_CACHE_TIMEOUT seconds so requests skip the product, price and Stripe
+    lookups; product and price webhooks clear the entry.
+    """
+    from apps.subscriptions.helpers import ACTIVE_PRODUCTS_CACHE_KEY, ACTIVE_PRODUCTS_CACHE_TIMEOUT
+
+    return cache.get_or_set(
+        ACTIVE_PRODUCTS_CACHE_KEY,
+        lambda: [p.to_dict() for p in get_active_products_with_metadata()],
+        ACTIVE_PRODUCTS_CACHE_TIMEOUT,
+    )
+
+
 def get_product_with_metadata(djstripe_product: Product) -> ProductWithMetadata:
-    if djstripe_product.id in ACTIVE_PRODUCT_IDS:
-        return ProductWithMetadata(product=djstripe_product, metadata=ProductMetadata.from_stripe_product(djstripe_product))
-    else:
-        return ProductWithMetadata(
-            product=djstripe_product, metadata=ProductMetadata.from_stripe_product(djstripe_product)
-        )
+    return ProductWithMetadata(product=djstripe_product, metadata=ProductMetadata.from_stripe_product(djstripe_product))
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0007_alter_subscriptionrequest_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productdemolink',
+            index=models.Index(fields=['display_order', 'product_name'], name='demolink_order_name_idx'),
+        ),
+    ]
@@ -138,6 +138,10 @@ class ProductDemoLink(models.Model):
         verbose_name = _("Product Demo Link")
         verbose_name_plural = _("Product Demo Links")
         ordering = ['display_order', 'product_name']
+        indexes = [
+            # Matches the default ordering so listings read in index order instead of sorting
+            models.Index(fields=['display_order', 'product_name'], name='demolink_order_name_idx'),
+        ]
     
     def __str__(self):
         return f"{self.product_name} - {self.button_text}"
@@ -1,6 +1,7 @@
 from django import template
+from django.db.models import Prefetch
 from django.utils.text import slugify
-from djstripe.models import Subscription
+from djstripe.models import Subscription, SubscriptionItem
 from djstripe.enums import SubscriptionStatus
 
 from ..models import SubscriptionRequest, SubscriptionAvailability
@@ -31,16 +32,20 @@ def user_active_subscriptions(user):
     if not user.is_authenticated or not user.customer:
         return []
     
+    # Load items with their price and product in one extra query instead of several per subscription
     subscriptions = Subscription.objects.filter(
         customer=user.customer,
         status__in=[SubscriptionStatus.active, SubscriptionStatus.trialing, SubscriptionStatus.past_due]
-    ).order_by('-created')
+    ).order_by('-created').prefetch_related(
+        Prefetch('items', queryset=SubscriptionItem.objects.select_related('price__product').order_by('pk'))
+    )
     
     subscription_nav_items = []
     for subscription in subscriptions:
         # Get the first product from the subscription
-        if subscription.items.exists():
-            first_item = subscription.items.first()
+        items = subscription.items.all()
+        if items:
+            first_item = items[0]
             product = first_item.price.product
             
             subscription_nav_items.append({
@@ -4,16 +4,17 @@ Test cases for ACTIVE_PRODUCTS filtering behavior.
 Tests that only products explicitly listed in ACTIVE_PRODUCTS are displayed,
 and that empty lists result in no products being shown (not a fallback to all products).
 """
-from unittest.mock import patch
+from unittest.mock import Mock, patch
+
 from django.test import TestCase, override_settings
-from djstripe.models import Product, Price
-from djstripe.enums import PriceType, PlanInterval
+from djstripe.enums import PlanInterval, PriceType
+from djstripe.models import Price, Product
 
+from apps.subscriptions.exceptions import SubscriptionConfigError
 from apps.subscriptions.metadata import (
-    get_active_products_with_metadata,
     ACTIVE_PRODUCTS,
+    get_active_products_with_metadata,
 )
-from apps.subscriptions.exceptions import SubscriptionConfigError
 
 
 class ActiveProductsFilteringTests(TestCase):
@@ -151,6 +152,24 @@ class ActiveProductsFilteringTests(TestCase):
         
         self.assertIn('prod_nonexistent', str(context.exception))
     
+    @override_settings(ACTIVE_PRODUCTS=['prod_test_sub_1', 'prod_test_sub_2', 'prod_test_sub_3'])
+    def test_products_and_prices_loaded_in_two_queries(self):
+        """Test that products and their prices are fetched in bulk rather than per product"""
+        from importlib import reload
+
+        from apps.subscriptions import metadata
+        reload(metadata)
+        
+        with patch.object(metadata, '_get_marketing_features', return_value=[]), self.assertNumQueries(2):
+            products = list(metadata.get_active_products_with_metadata())
+            for product_with_meta in products:
+                for interval in metadata.ACTIVE_PLAN_INTERVALS:
+                    product_with_meta._get_price(interval, fail_hard=False)
+        
+        self.assertEqual(len(products), 3)
+        self.assertIn('month', products[0].metadata.price_displays)
+        self.assertEqual(products[2].metadata.price_displays, {})
+    
     def test_product_metadata_extraction(self):
         """Test that product metadata is correctly extracted"""
         from importlib import reload
@@ -173,6 +192,28 @@ class ActiveProductsFilteringTests(TestCase):
             self.assertEqual(product_with_meta.metadata.description, 'First test subscription')
             self.assertEqual(product_with_meta.metadata.slug, 'test-subscription-1')
     
+    def test_features_fall_back_to_stripe_metadata(self):
+        """Test that features come from product metadata, as JSON or comma-separated, when Stripe has none"""
+        from apps.subscriptions import metadata
+        
+        self.product1.metadata = {'features': '["Reports", " Exports "]'}
+        self.product2.metadata = {'marketing_features': 'Alerts, Audit log,'}
+        with patch.object(metadata, '_get_marketing_features', return_value=[]):
+            self.assertEqual(
+                metadata.ProductMetadata.from_stripe_product(self.product1).features, ['Reports', 'Exports']
+            )
+            self.assertEqual(
+                metadata.ProductMetadata.from_stripe_product(self.product2).features, ['Alerts', 'Audit log']
+            )
+
+    def test_empty_metadata_features_means_no_features(self):
+        """Test that an empty 'features' metadata key isn't overridden by 'marketing_features'"""
+        from apps.subscriptions import metadata
+
+        self.product1.metadata = {'features': '', 'marketing_features': 'Alerts'}
+        with patch.object(metadata, '_get_marketing_features', return_value=[]):
+            self.assertEqual(metadata.ProductMetadata.from_stripe_product(self.product1).features, [])
+
     def test_price_displays_in_metadata(self):
         """Test that price displays are correctly populated in metadata"""
         from importlib import reload
@@ -234,8 +275,8 @@ class ActiveProductIDsSetTests(TestCase):
         from apps.subscriptions import metadata
         reload(metadata)
         
-        # ACTIVE_PRODUCT_IDS should be a set
-        self.assertIsInstance(metadata.ACTIVE_PRODUCT_IDS, set)
+        # ACTIVE_PRODUCT_IDS should be an immutable set
+        self.assertIsInstance(metadata.ACTIVE_PRODUCT_IDS, frozenset)
         
         # Should contain all IDs from ACTIVE_PRODUCTS
         self.assertEqual(metadata.ACTIVE_PRODUCT_IDS, {'prod_1', 'prod_2', 'prod_3'})
@@ -250,3 +291,29 @@ class ActiveProductIDsSetTests(TestCase):
         self.assertEqual(metadata.ACTIVE_PRODUCT_IDS, set())
         self.assertEqual(len(metadata.ACTIVE_PRODUCT_IDS), 0)
 
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ActiveProductsSerializedCacheTests(TestCase):
+    """Test that the serialized product catalog is cached until cleared"""
+    
+    def setUp(self):
+        from apps.subscriptions.helpers import clear_active_products_cache
+        clear_active_products_cache()
+        self.addCleanup(clear_active_products_cache)
+    
+    def test_catalog_is_built_once_until_cleared(self):
+        """Test that repeated calls reuse the cached catalog and clearing rebuilds it"""
+        from apps.subscriptions import metadata
+        from apps.subscriptions.helpers import clear_active_products_cache
+        
+        product_with_meta = Mock()
+        product_with_meta.to_dict.return_value = {'product': {'id': 'prod_cached'}}
+        with patch.object(metadata, 'get_active_products_with_metadata', return_value=[product_with_meta]) as mock_get:
+            self.assertEqual(metadata.get_active_products_serialized(), [{'product': {'id': 'prod_cached'}}])
+            self.assertEqual(metadata.get_active_products_serialized(), [{'product': {'id': 'prod_cached'}}])
+            self.assertEqual(mock_get.call_count, 1)
+            
+            clear_active_products_cache()
+            metadata.get_active_products_serialized()
+            self.assertEqual(mock_get.call_count, 2)
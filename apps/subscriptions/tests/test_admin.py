@@ -0,0 +1,69 @@
+"""
+Tests for the subscriptions admin.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.subscriptions.models import SubscriptionAvailability, SubscriptionRequest
+
+User = get_user_model()
+
+
+class SubscriptionRequestAdminTests(TestCase):
+    """Test the SubscriptionRequest admin pages."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(
+            username="admin@example.com", email="admin@example.com", password="adminpass123"
+        )
+        cls.changelist_url = reverse("admin:subscriptions_subscriptionrequest_changelist")
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def _create_requests(self, count, offset=0):
+        for i in range(offset, offset + count):
+            user = User.objects.create_user(username=f"user{i}@example.com", email=f"user{i}@example.com")
+            SubscriptionRequest.objects.create(
+                user=user,
+                product_name="Test Product",
+                product_stripe_id="prod_test_admin",
+            )
+
+    def _count_changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.changelist_url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        """user_info and view_user_link must read the joined user, not query it per row."""
+        self._create_requests(1)
+        baseline = self._count_changelist_queries()
+
+        self._create_requests(4, offset=1)
+        self.assertEqual(self._count_changelist_queries(), baseline)
+
+    def test_mark_approved_warns_once_about_missing_products(self):
+        """Requests for unknown Stripe products are approved but reported in a single warning."""
+        self._create_requests(2)
+
+        response = self.client.post(
+            self.changelist_url,
+            {
+                "action": "mark_approved",
+                "_selected_action": SubscriptionRequest.objects.values_list("pk", flat=True),
+            },
+            follow=True,
+        )
+
+        self.assertEqual(SubscriptionRequest.objects.filter(status="approved").count(), 2)
+        self.assertFalse(SubscriptionAvailability.objects.exists())
+        warnings = [m for m in get_messages(response.wsgi_request) if "prod_test_admin" in str(m)]
+        self.assertEqual(len(warnings), 1)
@@ -1,9 +1,14 @@
-from django.test import TestCase
+import os
+import tempfile
+from django.test import SimpleTestCase, TestCase
 from django.core.management import call_command
 from django.core.management.base import CommandError
 from io import StringIO
 from django.contrib.auth import get_user_model
 from djstripe.models import Product
+from apps.subscriptions.management.commands.update_available_subscriptions import (
+    Command as UpdateAvailableSubscriptionsCommand,
+)
 from apps.subscriptions.models import SubscriptionAvailability
 
 User = get_user_model()
@@ -179,3 +184,46 @@ class SubscriptionAvailabilityManagementCommandTests(TestCase):
         # Should still have only 2 records (one per product)
         availabilities = SubscriptionAvailability.objects.filter(user__isnull=True)
         self.assertEqual(availabilities.count(), 2)
+
+
+class UpdateAvailableSubscriptionsRemoveTests(SimpleTestCase):
+    """Test removing products from the ACTIVE_PRODUCTS list"""
+
+    def _remove(self, source, product_id):
+        """Run the removal against a temp file holding source and return (new source, output)"""
+        with tempfile.TemporaryDirectory() as tmp:
+            target_file = os.path.join(tmp, 'metadata.py')
+            with open(target_file, 'w') as f:
+                f.write(source)
+            out = StringIO()
+            UpdateAvailableSubscriptionsCommand(stdout=out)._remove_product_from_list(
+                product_id, 'Test Product', target_file
+            )
+            with open(target_file) as f:
+                return f.read(), out.getvalue()
+
+    def test_remove_from_single_line_list(self):
+        """Test removing an entry from a list written on one line"""
+        source, output = self._remove("ACTIVE_PRODUCTS = ['prod_a', 'prod_b']  # live\n", 'prod_a')
+
+        self.assertEqual(source, "ACTIVE_PRODUCTS = ['prod_b']  # live\n")
+        self.assertIn('Removed Test Product', output)
+
+    def test_remove_from_multi_line_list(self):
+        """Test removing an entry from a list with one entry per line"""
+        source, output = self._remove(
+            "ACTIVE_PRODUCTS = [\n    'prod_a',  # A\n    'prod_b',  # B\n]\n", 'prod_a'
+        )
+
+        self.assertEqual(source, "ACTIVE_PRODUCTS = [\n    'prod_b',  # B\n]\n")
+        self.assertIn('Removed Test Product', output)
+
+    def test_remove_absent_product(self):
+        """Test that removing a product not in the list leaves the file untouched"""
+        for original in ("ACTIVE_PRODUCTS = ['prod_b']\n", "ACTIVE_PRODUCTS = [\n    'prod_b',  # prod_a\n]\n"):
+            with self.subTest(original=original):
+                source, output = self._remove(original, 'prod_a')
+
+                self.assertEqual(source, original)
+                self.assertIn('is not in ACTIVE_PRODUCTS', output)
+                self.assertNotIn('Removed', output)
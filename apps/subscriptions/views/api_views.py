@@ -8,7 +8,7 @@ from apps.api.permissions import IsAuthenticatedOrHasUserAPIKey
 
 from ..exceptions import SubscriptionConfigError
 from ..helpers import create_stripe_checkout_session, create_stripe_portal_session
-from ..metadata import ProductWithMetadata, get_active_products_with_metadata
+from ..metadata import ProductWithMetadata, get_active_products_serialized
 
 
 @extend_schema(tags=["subscriptions"], exclude=True)
@@ -17,8 +17,7 @@ class ProductWithMetadataAPI(APIView):
 
     @extend_schema(operation_id="active_products_list", responses={200: ProductWithMetadata.serializer()})
     def get(self, request, *args, **kw):
-        products_with_metadata = get_active_products_with_metadata()
-        return Response(data=[p.to_dict() for p in products_with_metadata])
+        return Response(data=get_active_products_serialized())
 
 
 @extend_schema(tags=["subscriptions"], exclude=True)
@@ -6,7 +6,7 @@ from djstripe.models import Customer, Price, Subscription
 
 from apps.users.models import CustomUser
 
-from .helpers import provision_subscription
+from .helpers import clear_active_products_cache, clear_stripe_product_cache, provision_subscription
 
 log = logging.getLogger("test.subscription")
 
@@ -152,6 +152,25 @@ def handle_subscription_deleted(event, **kwargs):
     )
 
 
+@djstripe_receiver(["product.updated", "product.deleted"])
+def clear_cached_product(event, **kwargs):
+    """
+    Drop the cached Product used by the subscription request admin and the product's cached marketing
+    features, so edits made in Stripe show up immediately.
+    """
+    clear_stripe_product_cache(event.data["object"]["id"])
+
+
+@djstripe_receiver(
+    ["product.created", "product.updated", "product.deleted", "price.created", "price.updated", "price.deleted"]
+)
+def clear_cached_active_products(event, **kwargs):
+    """
+    Drop the cached serialized product catalog so product and price changes show up in the API.
+    """
+    clear_active_products_cache()
+
+
 def has_multiple_items(stripe_event_data):
     return len(stripe_event_data["object"]["items"]["data"]) > 1
 
@@ -4,7 +4,9 @@ from functools import cached_property
 
 from allauth.account.models import EmailAddress
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 from apps.subscriptions.models import SubscriptionModelBase
 from apps.users.helpers import validate_profile_picture
@@ -45,6 +47,15 @@ class CustomUser(SubscriptionModelBase, AbstractUser):
     custom_software = models.TextField(blank=True, help_text="Custom software tools not in the predefined list")
     completed_software_survey = models.BooleanField(default=False)
 
+    class Meta:
+        # Admin search filters these with icontains, i.e. UPPER(col::text) LIKE '%term%'. Trigram
+        # indexes on the same UPPER() expression let Postgres serve those scans from the index.
+        indexes = [
+            GinIndex(OpClass(Upper("email"), name="gin_trgm_ops"), name="user_email_trgm_idx"),
+            GinIndex(OpClass(Upper("first_name"), name="gin_trgm_ops"), name="user_first_name_trgm_idx"),
+            GinIndex(OpClass(Upper("last_name"), name="gin_trgm_ops"), name="user_last_name_trgm_idx"),
+        ]
+
     def __str__(self):
         return f"{self.get_full_name()} <{self.email or self.username}>"
 
@@ -157,6 +157,10 @@ _CACHED_LOADERS = [
     ),
 ]
 
+# Cached in production; set CACHE_TEMPLATES=True to profile cached rendering with DEBUG on.
+# Changes to templates under USER_PROGRAMS_DIR then need a restart to show up.
+CACHE_TEMPLATES = env.bool("CACHE_TEMPLATES", default=not DEBUG)
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -175,7 +179,7 @@ TEMPLATES = [
                 "apps.web.context_processors.google_analytics_id",
                 "apps.chat.context_processors.chat_websocket_url",
             ],
-            "loaders": _DEFAULT_LOADERS if DEBUG else _CACHED_LOADERS,
+            "loaders": _CACHED_LOADERS if CACHE_TEMPLATES else _DEFAULT_LOADERS,
             "builtins": [
                 "template_partials.templatetags.partials",
             ],
@@ -531,6 +535,8 @@ if "test" in sys.argv:
     # Silence unnecessary warnings in tests
     SILENCED_SYSTEM_CHECKS.append("djstripe.I002")
     SILENCED_SYSTEM_CHECKS.append("djstripe.I001")  # Silence API keys warning in tests
+    # Password hashing strength is irrelevant in tests and PBKDF2 dominates user creation/login time
+    PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
 
 
 # AI Chat Setup